@@ -1,11 +1,16 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from . import models, database
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, database, cache
 
 # Конфиг для JWT
 SECRET_KEY = "supersecretkey"  # Замени на свой ключ в проде
@@ -22,6 +27,42 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# bcrypt выполняется в отдельном пуле процессов с ограничением числа одновременных задач,
+# чтобы всплеск логинов не занимал общий threadpool синхронных эндпоинтов
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(PASSWORD_HASH_WORKERS * 2)))
+
+_password_executor: Optional[ProcessPoolExecutor] = None
+_password_semaphore = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
+
+# Процессы хэширования работают с пониженным приоритетом: при нехватке CPU
+# планировщик отдаёт его обработке обычных запросов, а не логинам
+def _lower_priority():
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+def get_password_executor() -> ProcessPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, initializer=_lower_priority)
+    return _password_executor
+
+def shutdown_password_executor():
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=True)
+        _password_executor = None
+
+async def _run_password_job(func, *args):
+    async with _password_semaphore:
+        return await asyncio.get_running_loop().run_in_executor(get_password_executor(), func, *args)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
 # Создание JWT токена
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -30,8 +71,29 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Проверенный пользователь запроса: снимок полей без привязки к сессии БД
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    email: str
+    is_admin: bool
+
+# Кэш проверенных пользователей по id, чтобы не ходить в БД на каждый авторизованный запрос.
+# Сбрасывается при изменении/удалении пользователя; TTL ограничивает задержку для других воркеров
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+principal_cache = cache.LRUCache(max_entries=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")), ttl=PRINCIPAL_CACHE_TTL)
+
+def invalidate_user(user_id: int):
+    principal_cache.delete(str(user_id))
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
+
 # Получение пользователя по токену
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -45,7 +107,12 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         user_id = int(user_id)
     except JWTError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    principal = principal_cache.get(str(user_id))
+    if principal is not None:
+        return principal
+    user = await db.get(models.User, user_id)
     if user is None:
         raise credentials_exception
-    return user 
\ No newline at end of file
+    principal = Principal(id=user.id, username=user.username, email=user.email, is_admin=bool(user.is_admin))
+    principal_cache.set(str(user_id), principal)
+    return principal
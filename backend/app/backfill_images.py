@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from . import models, database, images
+
+# Построение уменьшенных копий для уже существующих изображений:
+# python -m app.backfill_images [число процессов]
+def collect_sources() -> dict[str, str]:
+    # Ключ — имя файла: изображения из images/outfits перекрывают одноимённые из outfits_img
+    sources = {}
+    for directory in (images.SOURCE_IMAGES_DIR, images.IMAGES_DIR):
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if os.path.splitext(filename)[1].lower() in images.IMAGE_EXTENSIONS:
+                sources[filename] = os.path.join(directory, filename)
+    return sources
+
+def backfill(workers: int = os.cpu_count() or 1):
+    sources = collect_sources()
+    names = list(sources)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = dict(zip(names, pool.map(images.make_variants, [sources[name] for name in names], chunksize=4)))
+    elapsed = time.perf_counter() - started
+    print(f"Обработано изображений: {len(results)} за {elapsed:.1f} с ({workers} процессов)")
+
+    db = database.SessionLocal()
+    try:
+        updated = 0
+        for outfit in db.query(models.Outfit).filter(models.Outfit.image_url.isnot(None)):
+            variants = results.get(os.path.basename(outfit.image_url))
+            if variants is not None:
+                outfit.image_variants = variants
+                updated += 1
+        db.commit()
+        print(f"Обновлено аутфитов: {updated}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1)
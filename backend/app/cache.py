@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Protocol
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from . import serialization
+
+logger = logging.getLogger("outfitted.cache")
+
+# Настройки кэша ответов каталога
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Общий для всех воркеров бэкенд: "redis://..." или "local://" (локальная замена для разработки и тестов)
+CACHE_URL = os.getenv("CACHE_URL", "")
+# Таймаут соединения и операций с общим бэкендом, с
+CACHE_TIMEOUT = float(os.getenv("CACHE_TIMEOUT", "0.25"))
+
+# In-process LRU с TTL и ограничением по числу записей и суммарному размеру
+class LRUCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, tuple[Any, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                if entry is not None:
+                    self._pop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, size: int = 1, ttl: Optional[float] = None):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, size, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self.size += size
+            while len(self._data) > self.max_entries or self.size > self.max_bytes:
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _pop(self, key: str):
+        _, size, _ = self._data.pop(key)
+        self.size -= size
+
+# Общий бэкенд: хранит байты и счётчики поколений тегов. Методы блокирующие (сеть), поэтому из обработчиков
+# ResponseCache вызывает их в пуле потоков. mget возвращает None, если бэкенд недоступен
+class SharedBackend(Protocol):
+    def get(self, key: str) -> Optional[bytes]: ...
+    def set(self, key: str, value: bytes, ttl: float): ...
+    def mget(self, keys: list[str]) -> Optional[list[Optional[bytes]]]: ...
+    def incr(self, key: str) -> Optional[int]: ...
+
+# Ошибки и таймауты Redis не пробрасываются: недоступный Redis — это промахи кэша, а не 500 и не зависший воркер.
+# Потерянная при сбое инвалидация устаревает не позже чем через CACHE_TTL
+class RedisBackend:
+    def __init__(self, url: str, timeout: float = CACHE_TIMEOUT):
+        import redis
+        self.errors = redis.RedisError
+        self.client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get(key)
+        except self.errors as error:
+            logger.warning("Cache backend unavailable: %s", error)
+            return None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        try:
+            self.client.set(key, value, px=int(ttl * 1000))
+        except self.errors as error:
+            logger.warning("Cache backend unavailable: %s", error)
+
+    def mget(self, keys: list[str]) -> Optional[list[Optional[bytes]]]:
+        try:
+            return self.client.mget(keys)
+        except self.errors as error:
+            logger.warning("Cache backend unavailable: %s", error)
+            return None
+
+    def incr(self, key: str) -> Optional[int]:
+        try:
+            return self.client.incr(key)
+        except self.errors as error:
+            logger.error("Cache invalidation of %s lost: %s", key, error)
+            return None
+
+# Локальная замена общего бэкенда с тем же интерфейсом
+class LocalBackend:
+    def __init__(self):
+        self._data: dict[str, tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def mget(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._data.get(key, (b"0", 0))[0]) + 1
+            self._data[key] = (str(value).encode(), float("inf"))
+            return value
+
+def create_shared_backend(url: str) -> Optional[SharedBackend]:
+    if not url:
+        return None
+    if url.startswith("local://"):
+        return LocalBackend()
+    return RedisBackend(url)
+
+# Кэш ответов: запись лежит под ключом, в который входят текущие поколения её тегов.
+# Инвалидация тега — увеличение его поколения: старые записи перестают находиться и вытесняются по LRU/TTL.
+# Поколения хранятся в общем бэкенде (если он есть), поэтому инвалидация видна всем воркерам
+class ResponseCache:
+    def __init__(self, local: LRUCache, shared: Optional[SharedBackend] = None):
+        self.local = local
+        self.shared = shared
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # None — поколения тегов неизвестны (общий бэкенд недоступен): ответ не кэшируется
+    def versioned_key(self, key: str, tags: Iterable[str]) -> Optional[str]:
+        tags = sorted(tags)
+        if self.shared is not None:
+            values = self.shared.mget([f"cache:tag:{tag}" for tag in tags])
+            if values is None:
+                return None
+            generations = [int(value or 0) for value in values]
+        else:
+            with self._lock:
+                generations = [self._generations.get(tag, 0) for tag in tags]
+        return key + "|" + ",".join(f"{tag}@{generation}" for tag, generation in zip(tags, generations))
+
+    def get(self, key: str) -> Optional[tuple[bytes, str]]:
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self._get_shared(key)
+        return entry
+
+    def _get_shared(self, key: str) -> Optional[tuple[bytes, str]]:
+        raw = self.shared.get(f"cache:entry:{key}")
+        if raw is None:
+            return None
+        etag, body = raw.split(b"\n", 1)
+        entry = (body, etag.decode())
+        self.local.set(key, entry, size=len(body))
+        return entry
+
+    def set(self, key: str, body: bytes, etag: str):
+        self.local.set(key, (body, etag), size=len(body))
+        if self.shared is not None:
+            self.shared.set(f"cache:entry:{key}", etag.encode() + b"\n" + body, self.local.ttl)
+
+    # False — инвалидация не дошла до общего бэкенда (он недоступен)
+    def invalidate(self, *tags: str) -> bool:
+        delivered = True
+        for tag in tags:
+            if self.shared is not None:
+                delivered = self.shared.incr(f"cache:tag:{tag}") is not None and delivered
+            else:
+                with self._lock:
+                    self._generations[tag] = self._generations.get(tag, 0) + 1
+        return delivered
+
+    # Те же операции для обработчиков: обращения к общему бэкенду уходят в пул потоков и не блокируют цикл событий
+    async def aversioned_key(self, key: str, tags: Iterable[str]) -> Optional[str]:
+        if self.shared is None:
+            return self.versioned_key(key, tags)
+        return await run_in_threadpool(self.versioned_key, key, list(tags))
+
+    async def aget(self, key: str) -> Optional[tuple[bytes, str]]:
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = await run_in_threadpool(self._get_shared, key)
+        return entry
+
+    async def aset(self, key: str, body: bytes, etag: str):
+        if self.shared is None:
+            self.set(key, body, etag)
+        else:
+            await run_in_threadpool(self.set, key, body, etag)
+
+    async def ainvalidate(self, *tags: str):
+        if self.shared is None:
+            self.invalidate(*tags)
+        else:
+            await run_in_threadpool(self.invalidate, *tags)
+
+    def stats(self) -> dict:
+        lookups = self.local.hits + self.local.misses
+        return {
+            "hits": self.local.hits,
+            "misses": self.local.misses,
+            "hit_ratio": self.local.hits / lookups if lookups else 0.0,
+            "entries": len(self.local),
+            "bytes": self.local.size,
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+        }
+
+response_cache = ResponseCache(LRUCache(), create_shared_backend(CACHE_URL))
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+# Сравнение слабое (RFC 9110): W/"x" и "x" совпадают
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+# Ответ эндпоинта из кэша или через await build(); клиент с актуальным ETag получает 304.
+# ETag слабый: ответ может уйти сжатым (gzip/br), а представления по смыслу одинаковы
+async def cached_json_response(request: Request, key: str, tags: Iterable[str], build: Callable[[], Awaitable[Any]]) -> Response:
+    entry_key = await response_cache.aversioned_key(key, tags)
+    entry = await response_cache.aget(entry_key) if entry_key is not None else None
+    if entry is None:
+        body = serialization.dumps(await build())
+        entry = (body, "W/" + make_etag(body))
+        if entry_key is not None:
+            await response_cache.aset(entry_key, *entry)
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
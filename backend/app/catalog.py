@@ -0,0 +1,148 @@
+import logging
+import sys
+from typing import Iterable, Optional
+from sqlalchemy import bindparam, delete, exists, insert, select, update
+from sqlalchemy.orm import Session
+from . import models, database
+
+logger = logging.getLogger("outfitted.catalog")
+
+# Каталог вещей: одна строка items на нормализованный (name, brand, model), см. models.item_key.
+# Аутфиты ссылаются на общие вещи через outfit_items; при редактировании меняются только
+# добавленные/убранные связи, а вещи, оставшиеся без аутфитов, удаляются фоновой задачей
+BATCH_SIZE = 500
+
+def _item_values(item) -> dict:
+    if isinstance(item, dict):
+        values = {field: item.get(field) for field in ("name", "brand", "model")}
+    else:
+        values = {field: getattr(item, field, None) for field in ("name", "brand", "model")}
+    return {field: " ".join(value.split()) if isinstance(value, str) else value for field, value in values.items()}
+
+def item_key_of(item) -> str:
+    return models.item_key(**_item_values(item))
+
+# id вещей каталога по ключам для списка (объекты с name/brand/model или словари), в порядке входа без повторов.
+# Существующие находятся по уникальному ключу, недостающие вставляются одним INSERT ... ON CONFLICT DO NOTHING
+def resolve_items(db: Session, items: Iterable) -> dict[str, int]:
+    wanted: dict[str, dict] = {}
+    for item in items:
+        values = _item_values(item)
+        if values["name"]:
+            wanted.setdefault(models.item_key(**values), values)
+    if not wanted:
+        return {}
+    ids = dict(db.execute(_locked_items(wanted)).all())
+    missing = [dict(values, key=key) for key, values in wanted.items() if key not in ids]
+    if missing:
+        db.execute(database.insert_ignoring_conflicts(db.get_bind(), models.Item.__table__, ["key"]).values(missing))
+        ids.update(db.execute(_locked_items([row["key"] for row in missing])).all())
+    return {key: ids[key] for key in wanted}
+
+# Найденные вещи блокируются FOR KEY SHARE до конца транзакции: сборщик вещей без аутфитов
+# (collect_orphans, FOR UPDATE SKIP LOCKED) их пропустит, пока ссылка из outfit_items не закоммичена
+def _locked_items(keys):
+    return select(models.Item.key, models.Item.id).where(models.Item.key.in_(keys)).with_for_update(read=True, key_share=True)
+
+def resolve_item_ids(db: Session, items: Iterable) -> list[int]:
+    return list(resolve_items(db, items).values())
+
+# Привести вещи аутфита к item_ids минимальным изменением outfit_items; возвращает (добавленные, убранные)
+def set_outfit_items(db: Session, outfit_id: int, item_ids: Iterable[int]) -> tuple[list[int], list[int]]:
+    links = models.outfit_items.c
+    current = set(db.scalars(select(links.item_id).where(links.outfit_id == outfit_id)))
+    wanted = set(item_ids)
+    added, removed = sorted(wanted - current), sorted(current - wanted)
+    if removed:
+        db.execute(delete(models.outfit_items).where(links.outfit_id == outfit_id, links.item_id.in_(removed)))
+    if added:
+        db.execute(insert(models.outfit_items), [{"outfit_id": outfit_id, "item_id": item_id} for item_id in added])
+    return added, removed
+
+def outfit_item_ids(db: Session, outfit_id: int) -> list[int]:
+    links = models.outfit_items.c
+    return list(db.scalars(select(links.item_id).where(links.outfit_id == outfit_id)))
+
+# Удалить вещи без аутфитов: только из item_ids (после правки) или все пачками (полный проход)
+def collect_orphans(db: Session, item_ids: Optional[Iterable[int]] = None) -> int:
+    orphan = ~exists().where(models.outfit_items.c.item_id == models.Item.id)
+    if item_ids is not None:
+        item_ids = list(item_ids)
+        return _delete_orphans(db, select(models.Item.id).where(models.Item.id.in_(item_ids), orphan)) if item_ids else 0
+    removed, last_id = 0, 0
+    while ids := db.scalars(select(models.Item.id).where(models.Item.id > last_id, orphan).order_by(models.Item.id).limit(BATCH_SIZE)).all():
+        removed += _delete_orphans(db, select(models.Item.id).where(models.Item.id.in_(ids), orphan))
+        last_id = ids[-1]
+    return removed
+
+# Кандидаты блокируются FOR UPDATE SKIP LOCKED: вещи, которые незавершённая транзакция только что
+# сопоставила (resolve_items), пропускаются. Удаление в той же транзакции проверяет отсутствие
+# ссылок заново — в новом снимке видны связи, закоммиченные до блокировки
+def _delete_orphans(db: Session, candidates) -> int:
+    locked = db.scalars(candidates.with_for_update(skip_locked=True)).all()
+    removed = 0
+    if locked:
+        orphan = ~exists().where(models.outfit_items.c.item_id == models.Item.id)
+        removed = db.execute(
+            delete(models.Item).where(models.Item.id.in_(locked), orphan).execution_options(synchronize_session=False)
+        ).rowcount
+    db.commit()
+    return removed
+
+# Фоновая задача после правки или удаления аутфита
+def collect_orphans_job(item_ids: list[int]):
+    db = database.SessionLocal()
+    try:
+        removed = collect_orphans(db, item_ids)
+        if removed:
+            logger.info("Removed %s orphaned items", removed)
+    except Exception:
+        logger.exception("Failed to collect orphaned items")
+    finally:
+        db.close()
+
+# Слить дубли, накопленные до появления ключа: связи переводятся на вещь с меньшим id, дубли удаляются
+def deduplicate_items(db: Session) -> int:
+    canonical: dict[str, int] = {}
+    duplicates: dict[int, int] = {}
+    stale_keys = []
+    rows = db.execute(select(models.Item.id, models.Item.name, models.Item.brand, models.Item.model, models.Item.key).order_by(models.Item.id))
+    for item_id, name, brand, model, current_key in rows:
+        key = models.item_key(name, brand, model)
+        if key in canonical:
+            duplicates[item_id] = canonical[key]
+            continue
+        canonical[key] = item_id
+        if current_key != key:
+            stale_keys.append({"item_id": item_id, "item_key": key})
+    links = models.outfit_items.c
+    duplicate_ids = list(duplicates)
+    for start in range(0, len(duplicate_ids), BATCH_SIZE):
+        chunk = duplicate_ids[start:start + BATCH_SIZE]
+        moved = {(outfit_id, duplicates[item_id]) for outfit_id, item_id in db.execute(select(links.outfit_id, links.item_id).where(links.item_id.in_(chunk)))}
+        if moved:
+            db.execute(
+                database.insert_ignoring_conflicts(db.get_bind(), models.outfit_items),
+                [{"outfit_id": outfit_id, "item_id": item_id} for outfit_id, item_id in moved]
+            )
+        db.execute(delete(models.outfit_items).where(links.item_id.in_(chunk)))
+        db.execute(delete(models.Item).where(models.Item.id.in_(chunk)).execution_options(synchronize_session=False))
+    if stale_keys:
+        table = models.Item.__table__
+        db.execute(update(table).where(table.c.id == bindparam("item_id")).values(key=bindparam("item_key")), stale_keys)
+    db.commit()
+    return len(duplicates)
+
+# Обслуживание каталога: python -m app.catalog [dedupe|gc] (без аргумента — оба шага)
+def main(command: Optional[str] = None):
+    db = database.SessionLocal()
+    try:
+        if command in (None, "dedupe"):
+            print(f"Слито дублей вещей: {deduplicate_items(db)}")
+        if command in (None, "gc"):
+            print(f"Удалено вещей без аутфитов: {collect_orphans(db)}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,30 +1,29 @@
-from sqlalchemy.orm import Session
+import os
+from sqlalchemy import insert, select
 from . import models, database, auth
 
+# Учётная запись администратора; по умолчанию — shelf/shelf
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "shelf")
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "shelf@outfitted.ru")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "shelf")
+
+# Создание администратора: python -m app.create_admin
+# Идемпотентно и под блокировкой: при одновременном запуске пароль хэшируется и запись создаётся один раз
 def create_admin_user():
-    db = next(database.get_db())
-    
-    # Проверяем, существует ли уже пользователь shelf
-    existing_user = db.query(models.User).filter(models.User.username == "shelf").first()
-    
-    if existing_user:
-        print("Пользователь shelf уже существует")
-        return
-    
-    # Создаем хэш пароля
-    hashed_password = auth.get_password_hash("shelf")
-    
-    # Создаем пользователя-администратора
-    admin_user = models.User(
-        username="shelf",
-        email="shelf@outfitted.ru",
-        hashed_password=hashed_password,
-        is_admin=True
-    )
-    
-    db.add(admin_user)
-    db.commit()
-    print("Администратор shelf создан успешно")
+    with database.engine.begin() as connection:
+        with database.exclusive_lock(connection, "create-admin"):
+            # Проверяем, существует ли уже пользователь
+            if connection.scalar(select(models.User.id).where(models.User.username == ADMIN_USERNAME)):
+                print(f"Пользователь {ADMIN_USERNAME} уже существует")
+                return
+            # Создаем пользователя-администратора
+            connection.execute(insert(models.User).values(
+                username=ADMIN_USERNAME,
+                email=ADMIN_EMAIL,
+                hashed_password=auth.get_password_hash(ADMIN_PASSWORD),
+                is_admin=True
+            ))
+    print(f"Администратор {ADMIN_USERNAME} создан успешно")
 
 if __name__ == "__main__":
-    create_admin_user() 
\ No newline at end of file
+    create_admin_user()
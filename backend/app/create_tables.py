@@ -1,6 +1,7 @@
-from .database import Base, engine
-from . import models
- 
+from .database import engine
+from . import migrate
+
+# Схема создаётся и обновляется миграциями (см. app/migrate.py)
 print("Creating tables in DB:", engine.url)
-Base.metadata.create_all(bind=engine)
-print("Done!") 
\ No newline at end of file
+migrate.upgrade()
+print("Done!")
@@ -0,0 +1,95 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+from sqlalchemy import select
+from . import models, database, serialization
+
+# Выгрузка каталога целиком (аналитика, резервные копии): GET /outfits/export и python -m app.export.
+# Аутфиты читаются одним запросом через серверный курсор пачками по EXPORT_BATCH_SIZE (yield_per),
+# категории и вещи подгружаются на каждую пачку, поэтому память не зависит от размера каталога.
+# updated_since — только изменённые после момента времени (инкрементальная выгрузка)
+EXPORT_BATCH_SIZE = 500
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+# Колонки CSV совместимы с манифестом import_outfits (items — JSON-строка)
+CSV_COLUMNS = ("id", "title", "description", "category_id", "category", "image_url", "items", "favorites_count", "updated_at")
+
+# Наивное время считается UTC; в БД updated_at хранится в UTC
+def as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def export_query(category_id: Optional[int] = None, updated_since: Optional[datetime] = None):
+    query = select(models.Outfit).options(*models.outfit_load_options())
+    if category_id:
+        query = query.where(models.Outfit.category_id == category_id)
+    if updated_since is not None:
+        query = query.where(models.Outfit.updated_at >= as_utc(updated_since))
+    return query.order_by(models.Outfit.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+def export_row(outfit: models.Outfit) -> dict:
+    return {
+        "id": outfit.id,
+        "title": outfit.title,
+        "description": outfit.description,
+        "category_id": outfit.category_id,
+        "category": outfit.category.name if outfit.category else None,
+        "image_url": outfit.image_url,
+        "image_variants": outfit.image_variants,
+        "items": [{"name": item.name, "brand": item.brand, "model": item.model} for item in outfit.items],
+        "favorites_count": outfit.favorites_count,
+        "updated_at": as_utc(outfit.updated_at).isoformat() if outfit.updated_at else None,
+    }
+
+# Пачка аутфитов -> один фрагмент вывода в нужном формате
+def encode_batch(outfits: Iterable[models.Outfit], fmt: str) -> bytes:
+    rows = [export_row(outfit) for outfit in outfits]
+    if fmt == "ndjson":
+        return b"".join(serialization.dumps(row) + b"\n" for row in rows)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS, extrasaction="ignore")
+    for row in rows:
+        writer.writerow(dict(row, items=json.dumps(row["items"], ensure_ascii=False)))
+    return buffer.getvalue().encode()
+
+def csv_header() -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_COLUMNS)
+    return buffer.getvalue().encode()
+
+# Потоковая выгрузка из асинхронной сессии (для эндпоинта): сессия своя, потому что генератор
+# выполняется уже после возврата из обработчика
+async def stream_export(fmt: str, category_id: Optional[int] = None, updated_since: Optional[datetime] = None):
+    if fmt == "csv":
+        yield csv_header()
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream_scalars(export_query(category_id, updated_since))
+        async for outfits in result.partitions():
+            yield encode_batch(outfits, fmt)
+
+def iter_export(fmt: str, category_id: Optional[int] = None, updated_since: Optional[datetime] = None) -> Iterator[bytes]:
+    if fmt == "csv":
+        yield csv_header()
+    db = database.SessionLocal()
+    try:
+        for outfits in db.scalars(export_query(category_id, updated_since)).partitions():
+            yield encode_batch(outfits, fmt)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Выгрузка каталога аутфитов в NDJSON/CSV")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--category-id", type=int)
+    parser.add_argument("--updated-since", type=datetime.fromisoformat, help="ISO 8601; без часового пояса — UTC")
+    parser.add_argument("-o", "--output", help="файл (по умолчанию stdout)")
+    args = parser.parse_args()
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in iter_export(args.format, args.category_id, args.updated_since):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
@@ -0,0 +1,96 @@
+from typing import Iterable
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, database
+
+# Операции с избранным на уровне SQL: проверка по первичному ключу (user_id, outfit_id),
+# идемпотентные вставка/удаление и счётчик Outfit.favorites_count, который меняется
+# в той же транзакции ровно на число реально вставленных/удалённых строк
+async def is_favorite(db: AsyncSession, user_id: int, outfit_id: int) -> bool:
+    condition = (models.favorites.c.user_id == user_id) & (models.favorites.c.outfit_id == outfit_id)
+    return bool(await db.scalar(select(exists().where(condition))))
+
+# Существующие аутфиты из списка id (одним индексным запросом)
+async def existing_outfit_ids(db: AsyncSession, outfit_ids: Iterable[int]) -> set[int]:
+    outfit_ids = set(outfit_ids)
+    if not outfit_ids:
+        return set()
+    return set(await db.scalars(select(models.Outfit.id).where(models.Outfit.id.in_(outfit_ids))))
+
+async def _adjust_counts(db: AsyncSession, outfit_ids: list[int], delta: int):
+    if outfit_ids:
+        await db.execute(
+            update(models.Outfit)
+            .where(models.Outfit.id.in_(outfit_ids))
+            .values(favorites_count=models.Outfit.favorites_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+# Матрица совместных добавлений (recommendations.py): каждая пара "изменённый аутфит × другой аутфит
+# из избранного пользователя" получает ±1 в обе стороны одним INSERT ... ON CONFLICT DO UPDATE.
+# При удалении пары считаются и между убранными — до удаления они были в избранном вместе
+async def _adjust_cofavorites(db: AsyncSession, user_id: int, changed: list[int], delta: int):
+    if not changed:
+        return
+    others = set(await db.scalars(select(models.favorites.c.outfit_id).where(models.favorites.c.user_id == user_id)))
+    if delta < 0:
+        others.update(changed)
+    pairs = sorted({
+        pair
+        for outfit_id in changed for other_id in others if other_id != outfit_id
+        for pair in ((outfit_id, other_id), (other_id, outfit_id))
+    })
+    if not pairs:
+        return
+    table = models.outfit_cofavorites
+    await db.execute(
+        database.upsert_adding(db.get_bind(), table, ["outfit_id", "other_id"], "count"),
+        [{"outfit_id": outfit_id, "other_id": other_id, "count": delta} for outfit_id, other_id in pairs]
+    )
+    if delta < 0:
+        await db.execute(delete(table).where(table.c.outfit_id.in_(others), table.c.count <= 0))
+
+# Добавить аутфиты в избранное; возвращает id, которых там ещё не было
+async def add(db: AsyncSession, user_id: int, outfit_ids: Iterable[int]) -> list[int]:
+    rows = [{"user_id": user_id, "outfit_id": outfit_id} for outfit_id in sorted(set(outfit_ids))]
+    if not rows:
+        return []
+    statement = database.insert_ignoring_conflicts(db.get_bind(), models.favorites).values(rows).returning(models.favorites.c.outfit_id)
+    added = list(await db.scalars(statement))
+    await _adjust_counts(db, added, +1)
+    await _adjust_cofavorites(db, user_id, added, +1)
+    return added
+
+# Убрать аутфиты из избранного; возвращает id, которые там были
+async def remove(db: AsyncSession, user_id: int, outfit_ids: Iterable[int]) -> list[int]:
+    outfit_ids = sorted(set(outfit_ids))
+    if not outfit_ids:
+        return []
+    statement = (
+        delete(models.favorites)
+        .where(models.favorites.c.user_id == user_id, models.favorites.c.outfit_id.in_(outfit_ids))
+        .returning(models.favorites.c.outfit_id)
+    )
+    removed = list(await db.scalars(statement))
+    await _adjust_counts(db, removed, -1)
+    await _adjust_cofavorites(db, user_id, removed, -1)
+    return removed
+
+# Пересчитать счётчики по таблице favorites (после ручных правок БД): python -m app.favorites
+def recount_all():
+    db = database.SessionLocal()
+    try:
+        counts = (
+            select(func.count())
+            .where(models.favorites.c.outfit_id == models.Outfit.id)
+            .correlate(models.Outfit)
+            .scalar_subquery()
+        )
+        result = db.execute(update(models.Outfit).values(favorites_count=counts).execution_options(synchronize_session=False))
+        db.commit()
+        print(f"Пересчитаны счётчики избранного: {result.rowcount} аутфитов")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    recount_all()
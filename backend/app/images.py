@@ -0,0 +1,94 @@
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger("outfitted.images")
+
+# Оригиналы лежат в публичной папке фронтенда (IMAGES_DIR переопределяет её, например для бенчмарков),
+# производные — во вложенной variants/
+IMAGES_DIR = os.path.abspath(os.getenv("IMAGES_DIR", os.path.join(os.path.dirname(__file__), '../../frontend/public/images/outfits')))
+IMAGES_URL = "/images/outfits"
+VARIANTS_DIR = os.path.join(IMAGES_DIR, "variants")
+VARIANTS_URL = f"{IMAGES_URL}/variants"
+# Исходники демо-каталога в корне репозитория
+SOURCE_IMAGES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../outfits_img'))
+
+CHUNK_SIZE = 1024 * 1024
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+# Размер по большей стороне для каждого варианта
+VARIANT_SIZES = {"thumb": 400, "medium": 1000}
+VARIANT_FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}), "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# Генерация уменьшенных копий; выполняется в отдельном процессе,
+# поэтому принимает и возвращает только простые значения
+def make_variants(source_path: str) -> dict[str, dict[str, str]]:
+    from PIL import Image, ImageOps
+
+    os.makedirs(VARIANTS_DIR, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    variants: dict[str, dict[str, str]] = {}
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    for size_name, max_side in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        variants[size_name] = {}
+        for fmt_name, (pil_format, options) in VARIANT_FORMATS.items():
+            ext = "jpg" if fmt_name == "jpeg" else fmt_name
+            filename = f"{stem}_{size_name}.{ext}"
+            resized.save(os.path.join(VARIANTS_DIR, filename), pil_format, **options)
+            variants[size_name][fmt_name] = f"{VARIANTS_URL}/{filename}"
+    return variants
+
+# Варианты, уже построенные для этого файла (например, при повторной загрузке того же изображения)
+def existing_variants(source_path: str) -> Optional[dict[str, dict[str, str]]]:
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    variants: dict[str, dict[str, str]] = {}
+    for size_name in VARIANT_SIZES:
+        variants[size_name] = {}
+        for fmt_name in VARIANT_FORMATS:
+            filename = f"{stem}_{size_name}.{'jpg' if fmt_name == 'jpeg' else fmt_name}"
+            if not os.path.exists(os.path.join(VARIANTS_DIR, filename)):
+                return None
+            variants[size_name][fmt_name] = f"{VARIANTS_URL}/{filename}"
+    return variants
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+# Поставить генерацию вариантов в очередь; результат записывается в аутфит по готовности
+def schedule_variants(outfit_id: int, source_path: str) -> Future:
+    future = get_executor().submit(make_variants, source_path)
+    future.add_done_callback(lambda f: _store_variants(outfit_id, f))
+    return future
+
+def _store_variants(outfit_id: int, future: Future):
+    from . import models, database, cache
+
+    try:
+        variants = future.result()
+    except Exception:
+        logger.exception("Failed to build image variants for outfit %s", outfit_id)
+        return
+    db = database.SessionLocal()
+    try:
+        db.query(models.Outfit).filter(models.Outfit.id == outfit_id).update({models.Outfit.image_variants: variants})
+        db.commit()
+        cache.response_cache.invalidate("outfits", f"outfit:{outfit_id}")
+    finally:
+        db.close()
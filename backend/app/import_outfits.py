@@ -0,0 +1,208 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from . import models, database, images, storage, search, cache, catalog, pagination
+
+logger = logging.getLogger("outfitted.import")
+
+# Массовый импорт аутфитов из манифеста: python -m app.import_outfits manifest.jsonl [--workers N] [--batch-size N]
+# Манифест — JSONL (объект на строку) или CSV с колонками:
+#   title, description, category (имя, создаётся при отсутствии) или category_id,
+#   image (путь к файлу: абсолютный, относительно манифеста или имя из outfits_img) или image_url,
+#   items — список {"name", "brand", "model"}; в CSV — JSON-строка или "name|brand|model;name|brand|model"
+# Манифест читается потоково пачками; вещи сопоставляются с каталогом (catalog.py); изображения копируются в хранилище и обрабатываются в пуле процессов,
+# пока предыдущая пачка вставляется в БД многострочными INSERT
+DEFAULT_BATCH_SIZE = 500
+
+def parse_items(value) -> list[dict]:
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    items = []
+    for part in value.split(";"):
+        name, brand, model = (part.split("|") + [None, None])[:3]
+        if name and name.strip():
+            items.append({"name": name.strip(), "brand": brand or None, "model": model or None})
+    return items
+
+def read_manifest(path: str) -> Iterator[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def chunks(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def resolve_image(row: dict, base_dir: str) -> Optional[str]:
+    image = row.get("image")
+    if not image:
+        return None
+    for candidate in (image, os.path.join(base_dir, image), os.path.join(images.SOURCE_IMAGES_DIR, os.path.basename(image))):
+        if os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    raise FileNotFoundError(image)
+
+# Выполняется в процессе пула: копия в контентно-адресуемое хранилище и уменьшенные копии
+def prepare_image(source_path: str, build_variants: bool) -> tuple[str, Optional[dict]]:
+    with open(source_path, "rb") as f:
+        stored = storage.store_stream(f, storage.normalize_extension(source_path))
+    variants = images.existing_variants(stored.path)
+    if variants is None and build_variants:
+        variants = images.make_variants(stored.path)
+    return stored.url, variants
+
+class Importer:
+    def __init__(self, db: Session, source: str):
+        self.db = db
+        self.source = source
+        self.categories = {name: category_id for category_id, name in db.query(models.Category.id, models.Category.name)}
+        self.checkpoint = db.get(models.ImportCheckpoint, source)
+        if self.checkpoint is None:
+            self.checkpoint = models.ImportCheckpoint(source=source, rows_done=0)
+            db.add(self.checkpoint)
+        self.outfits = self.failed = 0
+        # Ключи вещей за весь импорт — для числа различных вещей в итоге
+        self.item_keys: set[str] = set()
+
+    def category_ids(self, rows: list[dict]) -> dict[str, int]:
+        missing = sorted({row["category"] for row in rows if row.get("category") and row["category"] not in self.categories})
+        if missing:
+            created = self.db.execute(
+                insert(models.Category).returning(models.Category.id, models.Category.name, sort_by_parameter_order=True),
+                [{"name": name} for name in missing]
+            )
+            self.categories.update({name: category_id for category_id, name in created})
+        return self.categories
+
+    # Вставка пачки: аутфиты, вещи и связи — по одному многострочному INSERT, затем checkpoint в той же транзакции
+    def write_batch(self, rows: list[dict], prepared: list[Optional[Future]]):
+        categories = self.category_ids(rows)
+        outfit_rows, item_groups = [], []
+        for row, future in zip(rows, prepared):
+            try:
+                image_url, variants = future.result() if future is not None else (row.get("image_url"), None)
+                items = parse_items(row.get("items"))
+                category_id = int(row["category_id"]) if row.get("category_id") else categories[row["category"]]
+                if not row.get("title"):
+                    raise ValueError("title is required")
+            except Exception as exc:
+                self.failed += 1
+                logger.warning("Row %r skipped: %s", row.get("title"), exc)
+                continue
+            outfit_rows.append({
+                "title": row["title"],
+                "description": row.get("description") or "",
+                "image_url": image_url,
+                "image_variants": variants,
+                "category_id": category_id,
+                "search_text": search.document_text(row.get("description"), items),
+            })
+            item_groups.append(items)
+        if outfit_rows:
+            outfit_ids = self.db.scalars(insert(models.Outfit).returning(models.Outfit.id, sort_by_parameter_order=True), outfit_rows).all()
+            # Вещи берутся из общего каталога: одинаковые (name, brand, model) не дублируются
+            item_ids = catalog.resolve_items(self.db, (item for items in item_groups for item in items))
+            links = {
+                (outfit_id, item_ids[key])
+                for outfit_id, items in zip(outfit_ids, item_groups)
+                for key in map(catalog.item_key_of, items) if key in item_ids
+            }
+            if links:
+                self.db.execute(insert(models.outfit_items), [{"outfit_id": outfit_id, "item_id": item_id} for outfit_id, item_id in links])
+            self.outfits += len(outfit_rows)
+            self.item_keys.update(item_ids)
+        self.checkpoint.rows_done += len(rows)
+        self.db.commit()
+
+def run_import(manifest: str, workers: int = images.IMAGE_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE, build_variants: bool = True, restart: bool = False):
+    source = os.path.abspath(manifest)
+    base_dir = os.path.dirname(source)
+    db = database.SessionLocal()
+    try:
+        importer = Importer(db, source)
+        if restart:
+            importer.checkpoint.rows_done = 0
+        skipped = importer.checkpoint.rows_done
+        if skipped:
+            print(f"Продолжаем импорт: пропущено {skipped} уже загруженных строк")
+        rows = islice(read_manifest(manifest), skipped, None)
+        started = time.perf_counter()
+        done = 0
+
+        def submit(pool: ProcessPoolExecutor, row: dict) -> Optional[Future]:
+            try:
+                path = resolve_image(row, base_dir)
+            except FileNotFoundError as exc:
+                future: Future = Future()
+                future.set_exception(exc)
+                return future
+            return pool.submit(prepare_image, path, build_variants) if path else None
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Изображения следующей пачки обрабатываются, пока текущая пишется в БД
+            pending: Optional[tuple[list[dict], list[Optional[Future]]]] = None
+            for batch in chunks(rows, batch_size):
+                prepared = [submit(pool, row) for row in batch]
+                if pending is not None:
+                    importer.write_batch(*pending)
+                    done += len(pending[0])
+                    report(done, started)
+                pending = (batch, prepared)
+            if pending is not None:
+                importer.write_batch(*pending)
+                done += len(pending[0])
+        elapsed = time.perf_counter() - started
+        print(
+            f"Импорт завершён: {done} строк за {elapsed:.1f} с ({done / elapsed if elapsed else 0:.0f} строк/с); "
+            f"аутфитов {importer.outfits}, различных вещей {len(importer.item_keys)}, пропущено {importer.failed}"
+        )
+    finally:
+        db.close()
+    report_cache_invalidation()
+    print("Векторы признаков для похожих аутфитов: python -m app.similarity")
+
+# Кэш ответов воркеров API можно сбросить из этого процесса только через общий Redis (CACHE_URL);
+# счётчики total (pagination.outfit_counts) живут в памяти каждого воркера и устаревают по своему TTL
+def report_cache_invalidation():
+    counts_ttl = pagination.outfit_counts.ttl
+    if isinstance(cache.response_cache.shared, cache.RedisBackend) and cache.response_cache.invalidate("outfits", "categories"):
+        print(f"Кэш ответов API сброшен через CACHE_URL; total в списках обновится в течение {counts_ttl:.0f} с")
+    else:
+        print(
+            f"Кэш ответов API не сброшен (CACHE_URL не задан или недоступен): работающие воркеры отдают списки без новых аутфитов "
+            f"до {cache.CACHE_TTL:.0f} с, total — до {counts_ttl:.0f} с"
+        )
+
+def report(done: int, started: float):
+    elapsed = time.perf_counter() - started
+    print(f"  {done} строк, {done / elapsed if elapsed else 0:.0f} строк/с")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Массовый импорт аутфитов из JSONL/CSV")
+    parser.add_argument("manifest")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="процессов для обработки изображений")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--no-variants", action="store_true", help="не строить уменьшенные копии (потом: python -m app.backfill_images)")
+    parser.add_argument("--restart", action="store_true", help="начать манифест заново, игнорируя сохранённый прогресс")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    run_import(args.manifest, args.workers, args.batch_size, not args.no_variants, args.restart)
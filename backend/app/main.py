@@ -1,14 +1,34 @@
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .database import Base, engine
-from . import models
+from .database import async_engine, QueryCounter, QueryBudgetExceeded, QUERY_BUDGET_STRICT
+from . import models, cache, images, auth, metrics
+from .compression import CompressionMiddleware
+from .serialization import FastJSONResponse
 from .routers_users import router as users_router
 from .routers_categories import router as categories_router
 from .routers_outfits import router as outfits_router
 from .routers_favorites import router as favorites_router
-from .create_admin import create_admin_user
+from .routers_images import router as images_router
 
-app = FastAPI(title="Outfitted")
+logger = logging.getLogger("outfitted")
+
+# Схема и администратор создаются до запуска воркеров: python -m app.migrate && python -m app.create_admin.
+# При старте воркера тяжёлой работы нет (пулы процессов и соединений создаются лениво),
+# при остановке освобождаем пулы
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    images.shutdown_executor()
+    auth.shutdown_password_executor()
+    await async_engine.dispose()
+
+# Ответы без response_model (словари) сериализуются через orjson; с response_model FastAPI
+# и так пишет JSON напрямую средствами pydantic
+app = FastAPI(title="Outfitted", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Добавь CORS
 app.add_middleware(
@@ -19,16 +39,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-Base.metadata.create_all(bind=engine)
+# Сжатие JSON-ответов (br/gzip по Accept-Encoding); ответы меньше COMPRESSION_MIN_SIZE не сжимаются
+app.add_middleware(CompressionMiddleware)
 
-# Создаем администратора при запуске
-create_admin_user()
+# Инструментирование запросов: латентность по маршрутам, число выполняющихся запросов,
+# число и время SQL-запросов (и сверка с бюджетом эндпоинта)
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    metrics.HTTP_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        with QueryCounter(request.scope) as counter:
+            response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        route = counter.route
+        metrics.HTTP_REQUESTS.inc(request.method, route, status_code)
+        metrics.HTTP_DURATION.observe(time.perf_counter() - started, request.method, route)
+        metrics.DB_QUERIES_PER_REQUEST.observe(counter.count, route)
+        metrics.DB_TIME_PER_REQUEST.observe(counter.duration, route)
+    response.headers["X-Query-Count"] = str(counter.count)
+    if counter.over_budget:
+        message = f"{request.method} {request.url.path}: {counter.count} SQL queries, budget {counter.budget}"
+        if QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
 
 app.include_router(users_router)
 app.include_router(categories_router)
 app.include_router(outfits_router)
 app.include_router(favorites_router)
+app.include_router(images_router)
 
 @app.get("/")
 def read_root():
-    return {"message": "Outfitted API"} 
\ No newline at end of file
+    return {"message": "Outfitted API"}
+
+# Счётчики попаданий и промахов кэша ответов
+@app.get("/cache/stats")
+def cache_stats():
+    return cache.response_cache.stats()
+
+# Метрики в текстовом формате Prometheus
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,127 @@
+import bisect
+import math
+import threading
+from typing import Iterable
+
+# Метрики в текстовом формате Prometheus (GET /metrics) без внешних зависимостей.
+# Значения хранятся по кортежу меток; обновление — словарь и счётчики под коротким локом,
+# поэтому метрики можно держать включёнными под полной нагрузкой
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # По кортежу меток: счётчики по корзинам (не накопительные), сумма и число наблюдений
+        self._values: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+            entry[0][index] += 1
+            entry[1][0] += value
+            entry[1][1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = [(labels, list(counts), list(totals)) for labels, (counts, totals) in self._values.items()]
+        lines = self.header()
+        for labels, counts, (total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                bound_label = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, bound_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {int(count)}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+registry = Registry()
+
+# HTTP: route — шаблон пути (/outfits/{outfit_id}), чтобы число рядов не зависело от id
+HTTP_REQUESTS = registry.register(Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+HTTP_DURATION = registry.register(Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route")))
+HTTP_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "HTTP requests being processed"))
+
+# SQL: число и суммарное время запросов на один HTTP-запрос, медленные запросы
+DB_QUERIES_PER_REQUEST = registry.register(Histogram("db_queries_per_request", "SQL statements per HTTP request", ("route",), QUERY_COUNT_BUCKETS))
+DB_TIME_PER_REQUEST = registry.register(Histogram("db_query_seconds_per_request", "Total SQL time per HTTP request", ("route",)))
+DB_SLOW_QUERIES = registry.register(Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS", ("route",)))
+
+# Пул соединений: выдачи, ожидание свободного соединения, занятые соединения, тайм-ауты
+DB_POOL_CHECKOUTS = registry.register(Counter("db_pool_checkouts_total", "Connections checked out of the pool", ("pool",)))
+DB_POOL_WAIT = registry.register(Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection", ("pool",)))
+DB_POOL_IN_USE = registry.register(Gauge("db_pool_connections_in_use", "Connections currently checked out", ("pool",)))
+DB_POOL_TIMEOUTS = registry.register(Counter("db_pool_timeouts_total", "Pool checkouts that timed out", ("pool",)))
+
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+def render() -> str:
+    return registry.render()
@@ -0,0 +1,32 @@
+import os
+import sys
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from . import database
+
+# Применение миграций: python -m app.migrate [ревизия, по умолчанию head].
+# Выполняется один раз при выкатке (а не каждым воркером при импорте приложения) и под блокировкой,
+# поэтому одновременный запуск из нескольких контейнеров безопасен
+ALEMBIC_INI = os.path.abspath(os.path.join(os.path.dirname(__file__), '../alembic.ini'))
+# Ревизия, соответствующая схеме из create_all до появления миграций
+BASELINE_REVISION = "0001"
+
+def alembic_config(connection=None) -> Config:
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["connection"] = connection
+    return config
+
+def upgrade(revision: str = "head"):
+    with database.engine.begin() as connection:
+        with database.exclusive_lock(connection, "migrations"):
+            config = alembic_config(connection)
+            tables = inspect(connection).get_table_names()
+            # База, созданная через create_all: помечаем исходной ревизией и доводим миграциями
+            if "users" in tables and "alembic_version" not in tables:
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, revision)
+
+if __name__ == "__main__":
+    upgrade(sys.argv[1] if len(sys.argv) > 1 else "head")
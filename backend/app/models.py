@@ -1,21 +1,39 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, Text, Boolean
-from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Text, Boolean, Index, JSON, DateTime, DDL, event, func, text
+from sqlalchemy.orm import relationship, joinedload, selectinload, load_only
 from .database import Base
 
-# Связующая таблица для вещей в аутфите
+# Связующая таблица для вещей в аутфите; индекс по item_id — для поиска вещей без аутфитов (catalog.py)
 outfit_items = Table(
     'outfit_items', Base.metadata,
-    Column('outfit_id', Integer, ForeignKey('outfits.id')),
-    Column('item_id', Integer, ForeignKey('items.id'))
+    Column('outfit_id', Integer, ForeignKey('outfits.id', ondelete='CASCADE'), primary_key=True),
+    Column('item_id', Integer, ForeignKey('items.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_outfit_items_item_id', 'item_id')
 )
 
 # Избранные аутфиты пользователя
+# Составной первичный ключ исключает дубли и даёт индексную проверку (user_id, outfit_id);
+# отдельный индекс по outfit_id — для выборок "кто лайкнул аутфит"
 favorites = Table(
     'favorites', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('outfit_id', Integer, ForeignKey('outfits.id'))
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+    Column('outfit_id', Integer, ForeignKey('outfits.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_favorites_outfit_id', 'outfit_id')
 )
 
+# Сколько пользователей добавили в избранное оба аутфита: разреженная симметричная матрица
+# совместных добавлений (хранятся обе пары). Меняется вместе с favorites, см. favorites.py
+outfit_cofavorites = Table(
+    'outfit_cofavorites', Base.metadata,
+    Column('outfit_id', Integer, ForeignKey('outfits.id', ondelete='CASCADE'), primary_key=True),
+    Column('other_id', Integer, ForeignKey('outfits.id', ondelete='CASCADE'), primary_key=True),
+    Column('count', Integer, nullable=False, default=0, server_default='0'),
+    Index('ix_outfit_cofavorites_other_id', 'other_id')
+)
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True, index=True)
@@ -33,19 +51,124 @@ class Category(Base):
 
 class Outfit(Base):
     __tablename__ = 'outfits'
+    # Индекс под keyset-пагинацию внутри категории: WHERE category_id = ? AND id > ? ORDER BY id
+    # и под список "самых популярных": ORDER BY favorites_count DESC, id DESC;
+    # по updated_at — инкрементальная выгрузка каталога (export.py)
+    __table_args__ = (
+        Index('ix_outfits_category_id_id', 'category_id', 'id'),
+        Index('ix_outfits_favorites_count_id', 'favorites_count', 'id'),
+        Index('ix_outfits_updated_at', 'updated_at'),
+    )
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(Text)
     image_url = Column(String)
+    # Уменьшенные копии изображения: {"thumb": {"webp": url, "jpeg": url}, "medium": {...}}
+    image_variants = Column(JSON)
+    # Описание и вещи (name/brand/model) одной строкой для полнотекстового поиска, см. search.py
+    search_text = Column(Text)
     category_id = Column(Integer, ForeignKey('categories.id'))
+    # Число пользователей, добавивших аутфит в избранное; поддерживается favorites.py
+    favorites_count = Column(Integer, nullable=False, default=0, server_default='0')
+    # Время последнего изменения строки (UTC) при любом UPDATE, в том числе счётчика избранного:
+    # изменение вещей тоже попадает сюда через search_text
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
     category = relationship('Category', back_populates='outfits')
     items = relationship('Item', secondary=outfit_items, back_populates='outfits')
     liked_by = relationship('User', secondary=favorites, back_populates='favorites')
 
+    # Пока варианты не готовы, отдаём оригинал
+    def variant_url(self, size: str, fmt: str = 'webp'):
+        variants = self.image_variants or {}
+        return variants.get(size, {}).get(fmt) or self.image_url
+
+    @property
+    def thumbnail_url(self):
+        return self.variant_url('thumb')
+
+    @property
+    def medium_url(self):
+        return self.variant_url('medium')
+
+# Нормализованный ключ вещи: регистр и лишние пробелы не различают одну и ту же вещь
+def normalize_item_part(value) -> str:
+    return " ".join((value or "").split()).casefold()
+
+def item_key(name, brand=None, model=None) -> str:
+    return "\x1f".join(normalize_item_part(value) for value in (name, brand, model))
+
+def _default_item_key(context):
+    params = context.get_current_parameters()
+    return item_key(params.get('name'), params.get('brand'), params.get('model'))
+
+# Вещь каталога — одна строка на (name, brand, model), общая для всех аутфитов
 class Item(Base):
     __tablename__ = 'items'
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     brand = Column(String)
     model = Column(String)
-    outfits = relationship('Outfit', secondary=outfit_items, back_populates='items') 
\ No newline at end of file
+    key = Column(String, nullable=False, unique=True, default=_default_item_key)
+    outfits = relationship('Outfit', secondary=outfit_items, back_populates='items') 
+
+# Прогресс массового импорта (import_outfits.py): сколько строк манифеста уже загружено.
+# Обновляется в той же транзакции, что и вставка пачки, поэтому повторный запуск продолжает с места остановки
+class ImportCheckpoint(Base):
+    __tablename__ = 'import_checkpoints'
+    source = Column(String, primary_key=True)
+    rows_done = Column(Integer, nullable=False, default=0)
+
+# Заранее посчитанные рекомендации "с этим аутфитом также добавляют" (recommendations.py):
+# [[outfit_id, score], ...] по убыванию score
+class OutfitRecommendation(Base):
+    __tablename__ = 'outfit_recommendations'
+    outfit_id = Column(Integer, ForeignKey('outfits.id', ondelete='CASCADE'), primary_key=True)
+    recommended = Column(JSON, nullable=False)
+
+# Поисковые индексы PostgreSQL: взвешенный tsvector (название важнее) и триграммы по названию
+def outfit_search_vector():
+    # Константы через text(), чтобы и в DDL индекса, и в запросах они были литералами, а не параметрами
+    simple, empty = text("'simple'"), text("''")
+    columns = Outfit.__table__.c
+    return (
+        func.setweight(func.to_tsvector(simple, func.coalesce(columns.title, empty)), text("'A'")).op('||')(
+            func.setweight(func.to_tsvector(simple, func.coalesce(columns.search_text, empty)), text("'B'"))
+        )
+    )
+
+event.listen(Base.metadata, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+Index('ix_outfits_search_tsv', outfit_search_vector(), postgresql_using='gin').ddl_if(dialect='postgresql')
+Index('ix_outfits_title_trgm', Outfit.title, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}).ddl_if(dialect='postgresql')
+
+# Стратегии загрузки связей: аутфит сериализуется с категорией и вещами
+# за фиксированное число запросов, без ленивых подзагрузок на каждую строку
+def outfit_load_options():
+    return (joinedload(Outfit.category), selectinload(Outfit.items))
+
+def user_load_options():
+    return (selectinload(User.favorites).options(*outfit_load_options()),)
+
+# Поля ответа аутфита и колонки, без которых их не получить: для fields= в списках
+# выбираются только нужные колонки, связи подгружаются, только если запрошены
+OUTFIT_FIELD_COLUMNS = {
+    'id': ('id',),
+    'title': ('title',),
+    'description': ('description',),
+    'image_url': ('image_url',),
+    'image_variants': ('image_variants',),
+    'thumbnail_url': ('image_url', 'image_variants'),
+    'medium_url': ('image_url', 'image_variants'),
+    'category_id': ('category_id',),
+    'category': ('category_id',),
+    'items': (),
+}
+
+def outfit_field_options(fields):
+    columns = {'id'}.union(*(OUTFIT_FIELD_COLUMNS[field] for field in fields))
+    options = [load_only(*(getattr(Outfit, column) for column in sorted(columns)))]
+    if 'category' in fields:
+        options.append(joinedload(Outfit.category))
+    if 'items' in fields:
+        options.append(selectinload(Outfit.items))
+    return tuple(options)
+
@@ -0,0 +1,82 @@
+import base64
+import json
+import threading
+import time
+from typing import Awaitable, Callable, Hashable, Optional
+
+# Курсор — непрозрачная для клиента строка: id последнего отданного аутфита
+# и категория, для которой он выдан (чтобы курсор нельзя было применить к другому фильтру)
+def encode_cursor(last_id: int, category_id: Optional[int]) -> str:
+    raw = json.dumps({"id": last_id, "c": category_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, category_id: Optional[int]) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Malformed cursor")
+    if data.get("c") != category_id:
+        raise ValueError("Cursor was issued for another filter")
+    return last_id
+
+# Список id для batch-запросов: "3,1,2" -> [3, 1, 2] без повторов, в порядке запроса
+BATCH_MAX_IDS = 100
+
+def parse_ids(ids: str, max_ids: int = BATCH_MAX_IDS) -> list[int]:
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers")
+    if not parsed:
+        raise ValueError("ids must not be empty")
+    if len(parsed) > max_ids:
+        raise ValueError(f"At most {max_ids} ids per request")
+    return parsed
+
+# Кэш количества аутфитов (всего и по категориям), чтобы не делать COUNT(*) на каждой странице.
+# Сбрасывается при создании/изменении/удалении аутфита; TTL ограничивает расхождение
+# между воркерами, у каждого из которых свой кэш
+class CountCache:
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._values: dict[Hashable, tuple[int, float]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], int]) -> int:
+        cached, generation = self._lookup(key)
+        if cached is not None:
+            return cached
+        value = loader()
+        self._store(key, value, generation)
+        return value
+
+    async def aget(self, key: Hashable, loader: Callable[[], Awaitable[int]]) -> int:
+        cached, generation = self._lookup(key)
+        if cached is not None:
+            return cached
+        value = await loader()
+        self._store(key, value, generation)
+        return value
+
+    def _lookup(self, key: Hashable) -> tuple[Optional[int], int]:
+        with self._lock:
+            cached = self._values.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0], self._generation
+            return None, self._generation
+
+    def _store(self, key: Hashable, value: int, generation: int):
+        with self._lock:
+            # Не сохраняем значение, посчитанное до параллельной инвалидации
+            if generation == self._generation:
+                self._values[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self):
+        with self._lock:
+            self._values.clear()
+            self._generation += 1
+
+outfit_counts = CountCache()
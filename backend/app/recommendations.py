@@ -0,0 +1,140 @@
+import logging
+import os
+from typing import Iterable
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from . import models, database, cache
+
+logger = logging.getLogger("outfitted.recommendations")
+
+# Рекомендации "с этим аутфитом также добавляют в избранное".
+# Матрица совместных добавлений outfit_cofavorites (C = AᵀA для матрицы пользователь×аутфит A)
+# обновляется на ±1 в транзакции изменения избранного (favorites.py). Score пары — доля добавивших a,
+# кто добавил и b: C[a, b] / n_a (n — favorites_count). Оба значения меняются только вместе с избранным
+# пользователя, у которого в избранном a, поэтому пересчёт списков затронутых аутфитов даёт тот же результат,
+# что и полный пересчёт. Списки top-k хранятся в outfit_recommendations: эндпоинты только читают готовое
+TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "50"))
+BATCH_SIZE = 500
+
+# Top-k по каждому аутфиту из строк (outfit_id, other_id, count) одним проходом numpy
+def top_k(rows: list[tuple], own_counts: dict[int, int], k: int = TOP_K) -> dict[int, list[list]]:
+    if not rows:
+        return {}
+    outfit_ids, other_ids, counts = (np.array(column, dtype=np.int64) for column in zip(*rows))
+    own_ids = np.fromiter(own_counts.keys(), dtype=np.int64, count=len(own_counts))
+    own_values = np.fromiter(own_counts.values(), dtype=np.int64, count=len(own_counts))
+    order = np.argsort(own_ids)
+    own_totals = own_values[order][np.searchsorted(own_ids[order], outfit_ids)]
+    scores = counts / np.maximum(own_totals, counts.clip(min=1))
+    # Сортировка по аутфиту, внутри — по убыванию score (при равенстве — по id); затем первые k в каждой группе
+    order = np.lexsort((other_ids, -scores, outfit_ids))
+    outfit_ids, other_ids, scores = outfit_ids[order], other_ids[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, outfit_ids[1:] != outfit_ids[:-1]])
+    ranks = np.arange(len(outfit_ids)) - np.repeat(starts, np.diff(np.r_[starts, len(outfit_ids)]))
+    keep = ranks < k
+    result: dict[int, list[list]] = {}
+    for outfit_id, other_id, score in zip(outfit_ids[keep].tolist(), other_ids[keep].tolist(), scores[keep].tolist()):
+        result.setdefault(outfit_id, []).append([other_id, round(score, 6)])
+    return result
+
+# Пересчитать сохранённые списки для аутфитов (пачками, каждая пачка — своя транзакция)
+def refresh(db: Session, outfit_ids: Iterable[int]) -> int:
+    outfit_ids = sorted(set(outfit_ids))
+    pairs = models.outfit_cofavorites.c
+    table = models.OutfitRecommendation
+    for start in range(0, len(outfit_ids), BATCH_SIZE):
+        chunk = outfit_ids[start:start + BATCH_SIZE]
+        own_counts = dict(db.execute(select(models.Outfit.id, models.Outfit.favorites_count).where(models.Outfit.id.in_(chunk))).all())
+        if not own_counts:
+            continue
+        rows = db.execute(
+            select(pairs.outfit_id, pairs.other_id, pairs.count).where(pairs.outfit_id.in_(list(own_counts)), pairs.count > 0)
+        ).all()
+        lists = top_k(rows, own_counts)
+        # Upsert, а не delete + insert: два одновременных пересчёта иначе оба удаляют 0 строк и второй
+        # падает на первичном ключе. Удаляются только списки, ставшие пустыми
+        if lists:
+            db.execute(
+                database.upsert_replacing(db.get_bind(), table.__table__, ["outfit_id"], "recommended"),
+                [{"outfit_id": outfit_id, "recommended": recommended} for outfit_id, recommended in lists.items()],
+            )
+        emptied = [outfit_id for outfit_id in chunk if outfit_id not in lists]
+        if emptied:
+            db.execute(delete(table).where(table.outfit_id.in_(emptied)).execution_options(synchronize_session=False))
+        db.commit()
+    return len(outfit_ids)
+
+# Фоновая задача после изменения избранного: у пользователя поменялись пары changed × его избранное,
+# поэтому пересчитываются списки этих аутфитов (убранные — тоже, они входят в changed)
+def refresh_for_user_job(user_id: int, changed: list[int]):
+    db = database.SessionLocal()
+    try:
+        current = db.scalars(select(models.favorites.c.outfit_id).where(models.favorites.c.user_id == user_id)).all()
+        refresh(db, set(current) | set(changed))
+    except Exception:
+        logger.exception("Failed to refresh recommendations for user %s", user_id)
+    finally:
+        db.close()
+    cache.response_cache.invalidate("recommendations")
+
+# Удаление аутфита: его строки матрицы и список удаляются явно (в SQLite каскады внешних ключей
+# не срабатывают, а id может достаться новому аутфиту); возвращает соседей, чьи списки надо пересчитать
+async def remove_outfit(db: AsyncSession, outfit_id: int) -> list[int]:
+    pairs = models.outfit_cofavorites
+    neighbors = list(await db.scalars(delete(pairs).where(pairs.c.outfit_id == outfit_id).returning(pairs.c.other_id)))
+    await db.execute(delete(pairs).where(pairs.c.other_id == outfit_id))
+    await db.execute(
+        delete(models.OutfitRecommendation)
+        .where(models.OutfitRecommendation.outfit_id == outfit_id)
+        .execution_options(synchronize_session=False)
+    )
+    return neighbors
+
+def refresh_job(outfit_ids: list[int]):
+    db = database.SessionLocal()
+    try:
+        refresh(db, outfit_ids)
+    except Exception:
+        logger.exception("Failed to refresh recommendations")
+    finally:
+        db.close()
+    cache.response_cache.invalidate("recommendations")
+
+# Персональная подборка: сумма score по спискам аутфитов из избранного, без уже добавленных
+def personalize(favorite_ids: Iterable[int], lists: Iterable[list], limit: int) -> list[int]:
+    entries = [entry for recommended in lists for entry in recommended]
+    if not entries:
+        return []
+    ids = np.array([entry[0] for entry in entries], dtype=np.int64)
+    scores = np.array([entry[1] for entry in entries], dtype=np.float64)
+    candidates, inverse = np.unique(ids, return_inverse=True)
+    totals = np.bincount(inverse, weights=scores)
+    totals[np.isin(candidates, np.fromiter(favorite_ids, dtype=np.int64))] = -np.inf
+    order = np.lexsort((candidates, -totals))
+    return [int(candidates[i]) for i in order[:limit] if np.isfinite(totals[i])]
+
+# Полный пересчёт: матрица заново по таблице favorites, затем списки всех аутфитов: python -m app.recommendations
+def rebuild_all():
+    db = database.SessionLocal()
+    try:
+        first, second = models.favorites.alias("a"), models.favorites.alias("b")
+        pairs = (
+            select(first.c.outfit_id, second.c.outfit_id, func.count())
+            .join(second, (second.c.user_id == first.c.user_id) & (second.c.outfit_id != first.c.outfit_id))
+            .group_by(first.c.outfit_id, second.c.outfit_id)
+        )
+        db.execute(delete(models.outfit_cofavorites))
+        db.execute(insert(models.outfit_cofavorites).from_select(["outfit_id", "other_id", "count"], pairs))
+        db.execute(delete(models.OutfitRecommendation))
+        db.commit()
+        outfit_ids = db.scalars(select(models.outfit_cofavorites.c.outfit_id).distinct()).all()
+        refresh(db, outfit_ids)
+        print(f"Рекомендации пересчитаны: {len(outfit_ids)} аутфитов с совместными добавлениями")
+    finally:
+        db.close()
+    cache.response_cache.invalidate("recommendations")
+
+if __name__ == "__main__":
+    rebuild_all()
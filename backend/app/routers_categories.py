@@ -1,51 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from . import models, schemas, auth, database
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, schemas, auth, database, cache, pagination
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 # Получить все категории
+# Ответы чтения кэшируются; теги сбрасываются обработчиками записи ниже
 @router.get("/", response_model=list[schemas.Category])
-def get_categories(db: Session = Depends(database.get_db)):
-    return db.query(models.Category).all()
+async def get_categories(request: Request, db: AsyncSession = Depends(database.get_async_db)):
+    async def build():
+        categories = await db.scalars(select(models.Category))
+        return [schemas.Category.model_validate(category) for category in categories]
+    return await cache.cached_json_response(request, "categories:list", ["categories"], build)
+
+# Несколько категорий по id: ?ids=3,1,2; порядок — как в ids, отсутствующие — в missing
+@router.get("/batch", response_model=schemas.Batch[schemas.Category], dependencies=[Depends(database.query_budget(1))])
+async def get_categories_batch(request: Request, ids: str = Query(..., max_length=1000), db: AsyncSession = Depends(database.get_async_db)):
+    try:
+        category_ids = pagination.parse_ids(ids)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    async def build():
+        by_id = {category.id: category for category in await db.scalars(select(models.Category).where(models.Category.id.in_(category_ids)))}
+        return schemas.Batch[schemas.Category](
+            items=[schemas.Category.model_validate(by_id[category_id]) for category_id in category_ids if category_id in by_id],
+            missing=[category_id for category_id in category_ids if category_id not in by_id]
+        )
+    return await cache.cached_json_response(request, f"categories:batch:{','.join(map(str, category_ids))}", ["categories"], build)
 
 # Получить категорию по id
 @router.get("/{category_id}", response_model=schemas.Category)
-def get_category(category_id: int, db: Session = Depends(database.get_db)):
-    category = db.query(models.Category).filter(models.Category.id == category_id).first()
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-    return category
+async def get_category(category_id: int, request: Request, db: AsyncSession = Depends(database.get_async_db)):
+    async def build():
+        category = await db.get(models.Category, category_id)
+        if not category:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return schemas.Category.model_validate(category)
+    return await cache.cached_json_response(request, f"categories:{category_id}", [f"category:{category_id}"], build)
 
 # Создать категорию (только авторизованный)
 @router.post("/", response_model=schemas.Category)
-def create_category(category: schemas.CategoryBase, db: Session = Depends(database.get_db), user=Depends(auth.get_current_user)):
-    db_category = db.query(models.Category).filter(models.Category.name == category.name).first()
+async def create_category(category: schemas.CategoryBase, db: AsyncSession = Depends(database.get_async_db), user=Depends(auth.get_current_user)):
+    db_category = await db.scalar(select(models.Category).where(models.Category.name == category.name))
     if db_category:
         raise HTTPException(status_code=400, detail="Category already exists")
     new_category = models.Category(name=category.name)
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await cache.response_cache.ainvalidate("categories")
     return new_category
 
 # Обновить категорию (только авторизованный)
 @router.put("/{category_id}", response_model=schemas.Category)
-def update_category(category_id: int, category: schemas.CategoryBase, db: Session = Depends(database.get_db), user=Depends(auth.get_current_user)):
-    db_category = db.query(models.Category).filter(models.Category.id == category_id).first()
+async def update_category(category_id: int, category: schemas.CategoryBase, db: AsyncSession = Depends(database.get_async_db), user=Depends(auth.get_current_user)):
+    db_category = await db.get(models.Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
     db_category.name = category.name # type: ignore
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    # Название категории встроено в ответы по аутфитам
+    await cache.response_cache.ainvalidate("categories", f"category:{category_id}", "category-names")
     return db_category
 
 # Удалить категорию (только авторизованный)
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(database.get_db), user=Depends(auth.get_current_user)):
-    db_category = db.query(models.Category).filter(models.Category.id == category_id).first()
+async def delete_category(category_id: int, db: AsyncSession = Depends(database.get_async_db), user=Depends(auth.get_current_user)):
+    db_category = await db.get(models.Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
-    db.delete(db_category)
-    db.commit()
-    return {"detail": "Category deleted"} 
\ No newline at end of file
+    await db.delete(db_category)
+    await db.commit()
+    await cache.response_cache.ainvalidate("categories", f"category:{category_id}", "category-names")
+    return {"detail": "Category deleted"}
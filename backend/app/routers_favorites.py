@@ -1,41 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from . import models, schemas, auth, database
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from . import models, schemas, auth, database, favorites, cache, recommendations
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
 
-# Получить избранные аутфиты текущего пользователя
-@router.get("/", response_model=list[schemas.Outfit])
-def get_favorites(user: models.User = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter(models.User.id == user.id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return db_user.favorites
-
-# Добавить аутфит в избранное
-@router.post("/{outfit_id}")
-def add_favorite(outfit_id: int, user: models.User = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter(models.User.id == user.id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    outfit = db.query(models.Outfit).filter(models.Outfit.id == outfit_id).first()
-    if not outfit:
+# Получить избранные аутфиты текущего пользователя (без limit — весь список)
+@router.get("/", response_model=list[schemas.Outfit], dependencies=[Depends(database.query_budget(3))])
+async def get_favorites(
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    user: auth.Principal = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    query = (
+        select(models.Outfit)
+        .join(models.favorites, models.favorites.c.outfit_id == models.Outfit.id)
+        .where(models.favorites.c.user_id == user.id)
+        .options(*models.outfit_load_options())
+        .order_by(models.favorites.c.outfit_id)
+        .offset(offset)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return (await db.scalars(query)).all()
+
+# Избранное изменилось: сбрасываем кэш списков, где счётчики участвуют в сортировке,
+# и после ответа пересчитываем рекомендации затронутых аутфитов
+async def favorites_changed(background_tasks: BackgroundTasks, user_id: int, outfit_ids: list[int]):
+    await cache.response_cache.ainvalidate("popular")
+    background_tasks.add_task(recommendations.refresh_for_user_job, user_id, outfit_ids)
+
+# Персональная подборка по избранному: складываются готовые списки рекомендаций его аутфитов
+@router.get("/recommended", response_model=list[schemas.Outfit], dependencies=[Depends(database.query_budget(5))])
+async def get_recommended(
+    limit: int = Query(12, ge=1, le=50),
+    user: auth.Principal = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    favorite_ids = (await db.scalars(select(models.favorites.c.outfit_id).where(models.favorites.c.user_id == user.id))).all()
+    if not favorite_ids:
+        return []
+    lists = await db.scalars(
+        select(models.OutfitRecommendation.recommended).where(models.OutfitRecommendation.outfit_id.in_(favorite_ids))
+    )
+    ids = recommendations.personalize(favorite_ids, lists, limit)
+    if not ids:
+        return []
+    outfits = await db.scalars(select(models.Outfit).options(*models.outfit_load_options()).where(models.Outfit.id.in_(ids)))
+    by_id = {outfit.id: outfit for outfit in outfits}
+    return [by_id[outfit_id] for outfit_id in ids if outfit_id in by_id]
+
+# Добавить несколько аутфитов в избранное; уже добавленные пропускаются
+@router.post("/bulk", dependencies=[Depends(database.query_budget(6))])
+async def add_favorites(payload: schemas.FavoriteIds, background_tasks: BackgroundTasks, user: auth.Principal = Depends(auth.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    existing = await favorites.existing_outfit_ids(db, payload.outfit_ids)
+    added = await favorites.add(db, user.id, existing)
+    await db.commit()
+    if added:
+        await favorites_changed(background_tasks, user.id, added)
+    return {"added": added, "missing": sorted(set(payload.outfit_ids) - existing)}
+
+# Удалить несколько аутфитов из избранного
+@router.delete("/bulk", dependencies=[Depends(database.query_budget(6))])
+async def remove_favorites(payload: schemas.FavoriteIds, background_tasks: BackgroundTasks, user: auth.Principal = Depends(auth.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    removed = await favorites.remove(db, user.id, payload.outfit_ids)
+    await db.commit()
+    if removed:
+        await favorites_changed(background_tasks, user.id, removed)
+    return {"removed": removed}
+
+# Находится ли аутфит в избранном (проверка по первичному ключу, без загрузки списка)
+@router.get("/{outfit_id}", dependencies=[Depends(database.query_budget(1))])
+async def get_favorite_status(outfit_id: int, user: auth.Principal = Depends(auth.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    return {"is_favorite": await favorites.is_favorite(db, user.id, outfit_id)}
+
+# Добавить аутфит в избранное (повторное добавление не ошибка)
+@router.post("/{outfit_id}", dependencies=[Depends(database.query_budget(6))])
+async def add_favorite(outfit_id: int, background_tasks: BackgroundTasks, user: auth.Principal = Depends(auth.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    if not await favorites.existing_outfit_ids(db, [outfit_id]):
         raise HTTPException(status_code=404, detail="Outfit not found")
-    if outfit in db_user.favorites:
-        raise HTTPException(status_code=400, detail="Outfit already in favorites")
-    db_user.favorites.append(outfit)
-    db.commit()
-    return {"detail": "Added to favorites"}
-
-# Удалить аутфит из избранного
-@router.delete("/{outfit_id}")
-def remove_favorite(outfit_id: int, user: models.User = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter(models.User.id == user.id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    outfit = db.query(models.Outfit).filter(models.Outfit.id == outfit_id).first()
-    if not outfit or outfit not in db_user.favorites:
-        raise HTTPException(status_code=404, detail="Outfit not in favorites")
-    db_user.favorites.remove(outfit)
-    db.commit()
-    return {"detail": "Removed from favorites"} 
\ No newline at end of file
+    added = await favorites.add(db, user.id, [outfit_id])
+    await db.commit()
+    if added:
+        await favorites_changed(background_tasks, user.id, added)
+    return {"detail": "Added to favorites", "changed": bool(added)}
+
+# Удалить аутфит из избранного (удаление отсутствующего не ошибка)
+@router.delete("/{outfit_id}", dependencies=[Depends(database.query_budget(6))])
+async def remove_favorite(outfit_id: int, background_tasks: BackgroundTasks, user: auth.Principal = Depends(auth.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    removed = await favorites.remove(db, user.id, [outfit_id])
+    await db.commit()
+    if removed:
+        await favorites_changed(background_tasks, user.id, removed)
+    return {"detail": "Removed from favorites", "changed": bool(removed)}
@@ -0,0 +1,24 @@
+import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from . import storage, cache
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+# Контентно-адресуемые файлы не меняются никогда, остальные кэшируем на сутки с перепроверкой по ETag
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=86400"
+
+# Отдача изображения аутфита: ETag, 304 по If-None-Match, Range-запросы.
+# FileResponse отправляет файл через http.response.pathsend, если сервер это поддерживает (zero-copy)
+@router.api_route("/outfits/{file_path:path}", methods=["GET", "HEAD"])
+def get_outfit_image(file_path: str, request: Request):
+    path = storage.resolve(file_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    etag = storage.strong_etag(path)
+    cache_control = IMMUTABLE_CACHE_CONTROL if storage.is_content_addressed(os.path.basename(path)) else DEFAULT_CACHE_CONTROL
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, headers=headers)
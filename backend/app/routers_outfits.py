@@ -1,49 +1,229 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from . import models, schemas, auth, database
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, Query, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, schemas, auth, database, pagination, images, storage, cache, search, similarity, catalog, export, recommendations
+from .serialization import FastJSONResponse
+from datetime import datetime
 from typing import Optional
-import os
-from uuid import uuid4
 import inspect
 import re
 
 router = APIRouter(prefix="/outfits", tags=["outfits"])
 
 # Получить все аутфиты (с фильтрацией по категории и пагинацией)
-@router.get("/", response_model=dict)
-def get_outfits(
+# Пагинация по offset или по курсору: next_cursor из ответа передаётся в cursor следующего запроса,
+# и страница выбирается по индексу (category_id, id) без сканирования пропущенных строк.
+# fields=id,title,thumbnail_url — только перечисленные поля (для сеток каталога): из БД читаются лишь нужные колонки
+@router.get("/", response_model=schemas.Page[schemas.Outfit], dependencies=[Depends(database.query_budget(3))])
+async def get_outfits(
+    request: Request,
     category_id: Optional[int] = Query(None),
     limit: int = Query(12, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(database.get_db)
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
+    fields: Optional[str] = Query(None, max_length=200),
+    db: AsyncSession = Depends(database.get_async_db)
 ):
-    query = db.query(models.Outfit)
+    selected = parse_fields(fields)
+    key = f"outfits:list:{category_id}:{limit}:{offset}:{cursor}:{include_total}:{','.join(selected or ())}"
+    build = lambda: list_outfits(db, category_id, limit, offset, cursor, include_total, selected)
+    return await cache.cached_json_response(request, key, ["outfits", "category-names"], build)
+
+# Разобрать fields: None — все поля; неизвестное поле — 400
+def parse_fields(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    if not fields:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - models.OUTFIT_FIELD_COLUMNS.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(selected | {"id"}))
+
+# Аутфит в виде словаря только с выбранными полями
+def project_outfit(outfit: models.Outfit, fields: tuple[str, ...]) -> dict:
+    data = {}
+    for field in fields:
+        if field == "category":
+            data[field] = schemas.Category.model_validate(outfit.category).model_dump() if outfit.category else None
+        elif field == "items":
+            data[field] = [schemas.Item.model_validate(item).model_dump() for item in outfit.items]
+        else:
+            data[field] = getattr(outfit, field)
+    return data
+
+# Страница каталога из БД (без кэша)
+async def list_outfits(
+    db: AsyncSession,
+    category_id: Optional[int],
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: bool,
+    fields: Optional[tuple[str, ...]] = None
+):
+    query = select(models.Outfit)
     if category_id:
-        query = query.filter(models.Outfit.category_id == category_id)
-    total = query.count()
-    items = query.offset(offset).limit(limit).all()
-    return {
-        "total": total,
-        "items": [schemas.Outfit.model_validate(item) for item in items]
-    }
+        query = query.where(models.Outfit.category_id == category_id)
+    count_query = select(func.count()).select_from(query.subquery())
+    total = await pagination.outfit_counts.aget(category_id, lambda: db.scalar(count_query)) if include_total else None
+    if cursor:
+        try:
+            after_id = pagination.decode_cursor(cursor, category_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(models.Outfit.id > after_id)
+    else:
+        query = query.offset(offset)
+    options = models.outfit_field_options(fields) if fields else models.outfit_load_options()
+    # Берём на одну строку больше, чтобы понять, есть ли следующая страница
+    rows = (await db.scalars(query.options(*options).order_by(models.Outfit.id).limit(limit + 1))).all()
+    items = rows[:limit]
+    next_cursor = pagination.encode_cursor(items[-1].id, category_id) if len(rows) > limit else None
+    if fields:
+        return {"total": total, "items": [project_outfit(item, fields) for item in items], "next_cursor": next_cursor}
+    return schemas.Page[schemas.Outfit].model_validate({"total": total, "items": items, "next_cursor": next_cursor}, from_attributes=True)
 
-# Получить аутфит по id
-@router.get("/{outfit_id}", response_model=schemas.Outfit)
-def get_outfit(outfit_id: int, db: Session = Depends(database.get_db)):
-    outfit = db.query(models.Outfit).filter(models.Outfit.id == outfit_id).first()
+# Аутфит со всеми связями для ответа (обновляет уже загруженный в сессию объект)
+async def load_outfit(db: AsyncSession, outfit_id: int) -> models.Outfit:
+    outfit = await db.scalar(
+        select(models.Outfit)
+        .options(*models.outfit_load_options())
+        .where(models.Outfit.id == outfit_id)
+        .execution_options(populate_existing=True)
+    )
     if not outfit:
         raise HTTPException(status_code=404, detail="Outfit not found")
     return outfit
 
+# Поиск по названию, описанию и вещам (бренд, модель); слова запроса ищутся как префиксы
+@router.get("/search", response_model=schemas.Page[schemas.Outfit], dependencies=[Depends(database.query_budget(5))])
+async def search_outfits(
+    q: str = Query(..., min_length=1, max_length=200),
+    category_id: Optional[int] = Query(None),
+    limit: int = Query(12, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    total, items = await db.run_sync(search.search_outfits, q, category_id, limit, offset)
+    # Страница уже проверена моделью — отдаём её без повторной валидации по response_model
+    page = schemas.Page[schemas.Outfit].model_validate({"total": total, "items": items}, from_attributes=True)
+    return FastJSONResponse(page)
+
+# Самые популярные аутфиты: по числу добавлений в избранное (индекс по favorites_count, id)
+@router.get("/popular", response_model=list[schemas.PopularOutfit], dependencies=[Depends(database.query_budget(2))])
+async def get_popular_outfits(
+    request: Request,
+    limit: int = Query(12, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    async def build():
+        outfits = await db.scalars(
+            select(models.Outfit)
+            .options(*models.outfit_load_options())
+            .order_by(models.Outfit.favorites_count.desc(), models.Outfit.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return [schemas.PopularOutfit.model_validate(outfit) for outfit in outfits]
+    return await cache.cached_json_response(request, f"outfits:popular:{limit}:{offset}", ["popular", "outfits", "category-names"], build)
+
+# Выгрузка всего каталога потоком (только администратор): ?format=ndjson|csv&category_id=&updated_since=ISO
+@router.get("/export")
+async def export_outfits(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    category_id: Optional[int] = Query(None),
+    updated_since: Optional[datetime] = Query(None),
+    user=Depends(auth.get_current_user)
+):
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Only administrators can export outfits")
+    return StreamingResponse(
+        export.stream_export(format, category_id, updated_since),
+        media_type=export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="outfits.{format}"'}
+    )
+
+# Несколько аутфитов по id одним запросом: ?ids=3,1,2[&fields=...]; порядок — как в ids, отсутствующие — в missing
+@router.get("/batch", response_model=schemas.Batch[schemas.Outfit], dependencies=[Depends(database.query_budget(2))])
+async def get_outfits_batch(
+    request: Request,
+    ids: str = Query(..., max_length=1000),
+    fields: Optional[str] = Query(None, max_length=200),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    try:
+        outfit_ids = pagination.parse_ids(ids)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    selected = parse_fields(fields)
+
+    async def build():
+        options = models.outfit_field_options(selected) if selected else models.outfit_load_options()
+        outfits = await db.scalars(select(models.Outfit).options(*options).where(models.Outfit.id.in_(outfit_ids)))
+        by_id = {outfit.id: outfit for outfit in outfits}
+        found = [by_id[outfit_id] for outfit_id in outfit_ids if outfit_id in by_id]
+        missing = [outfit_id for outfit_id in outfit_ids if outfit_id not in by_id]
+        if selected:
+            return {"items": [project_outfit(outfit, selected) for outfit in found], "missing": missing}
+        return schemas.Batch[schemas.Outfit].model_validate({"items": found, "missing": missing}, from_attributes=True)
+    key = f"outfits:batch:{','.join(map(str, outfit_ids))}:{','.join(selected or ())}"
+    return await cache.cached_json_response(request, key, ["outfits", "category-names"], build)
+
+# Получить аутфит по id
+@router.get("/{outfit_id}", response_model=schemas.Outfit, dependencies=[Depends(database.query_budget(2))])
+async def get_outfit(outfit_id: int, request: Request, db: AsyncSession = Depends(database.get_async_db)):
+    async def build():
+        return schemas.Outfit.model_validate(await load_outfit(db, outfit_id))
+    return await cache.cached_json_response(request, f"outfits:{outfit_id}", [f"outfit:{outfit_id}", "category-names"], build)
+
+# Похожие по изображению аутфиты (векторы признаков считаются при загрузке)
+@router.get("/{outfit_id}/similar", response_model=list[schemas.Outfit], dependencies=[Depends(database.query_budget(3))])
+async def get_similar_outfits(outfit_id: int, limit: int = Query(6, ge=1, le=50), db: AsyncSession = Depends(database.get_async_db)):
+    if not await db.scalar(select(models.Outfit.id).where(models.Outfit.id == outfit_id)):
+        raise HTTPException(status_code=404, detail="Outfit not found")
+    ids = [similar_id for similar_id, _ in await run_in_threadpool(similarity.feature_index.similar, outfit_id, limit)]
+    if not ids:
+        return []
+    outfits = await db.scalars(select(models.Outfit).options(*models.outfit_load_options()).where(models.Outfit.id.in_(ids)))
+    by_id = {outfit.id: outfit for outfit in outfits}
+    return [by_id[similar_id] for similar_id in ids if similar_id in by_id]
+
+# "С этим аутфитом также добавляют в избранное": готовый список из outfit_recommendations
+@router.get("/{outfit_id}/recommended", response_model=list[schemas.Outfit], dependencies=[Depends(database.query_budget(4))])
+async def get_recommended_outfits(
+    outfit_id: int,
+    request: Request,
+    limit: int = Query(6, ge=1, le=50),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    async def build():
+        recommended = await db.scalar(
+            select(models.OutfitRecommendation.recommended).where(models.OutfitRecommendation.outfit_id == outfit_id)
+        )
+        if recommended is None:
+            if not await db.scalar(select(models.Outfit.id).where(models.Outfit.id == outfit_id)):
+                raise HTTPException(status_code=404, detail="Outfit not found")
+            return []
+        ids = [other_id for other_id, _ in recommended[:limit]]
+        outfits = await db.scalars(select(models.Outfit).options(*models.outfit_load_options()).where(models.Outfit.id.in_(ids)))
+        by_id = {outfit.id: outfit for outfit in outfits}
+        return [schemas.Outfit.model_validate(by_id[other_id]) for other_id in ids if other_id in by_id]
+    key = f"outfits:{outfit_id}:recommended:{limit}"
+    return await cache.cached_json_response(request, key, ["recommendations", "outfits", "category-names"], build)
+
 # Создать аутфит (только администратор)
 @router.post("/", response_model=schemas.Outfit)
-def create_outfit(
+async def create_outfit(
     title: str = Form(...),
     description: str = Form(''),
     category_id: int = Form(...),
     image: UploadFile = File(...),
     # items как динамические поля формы
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     user=Depends(auth.get_current_user),
     # request: Request  # если понадобится
 ):
@@ -62,16 +242,9 @@ def create_outfit(
     # Получаем их из FastAPI FormData через request, но тут workaround: используем image.filename как триггер
     # Воспользуемся image.file для сохранения файла
 
-    # Сохраняем файл
-    images_dir = os.path.join(os.path.dirname(__file__), '../../frontend/public/images/outfits')
-    images_dir = os.path.abspath(images_dir)
-    os.makedirs(images_dir, exist_ok=True)
-    ext = os.path.splitext(image.filename)[1]
-    filename = f"{uuid4().hex}{ext}"
-    file_path = os.path.join(images_dir, filename)
-    with open(file_path, "wb") as f:
-        f.write(image.file.read())
-    image_url = f"/images/outfits/{filename}"
+    # Сохраняем файл потоково под именем-хэшем (одинаковые загрузки не дублируются),
+    # уменьшенные копии строятся в фоне после коммита
+    stored = await storage.store_upload(image)
 
     # Парсим items из FormData (ищем все поля items[<idx>][name], ...)
     # FastAPI не даёт доступ к request.form() тут, workaround: используем глобальный request, но проще -
@@ -86,60 +259,103 @@ def create_outfit(
         model = values.get(f'items[{idx}][model]')
         if name is None:
             break
-        items.append(models.Item(name=name, brand=brand, model=model))
+        items.append({"name": name, "brand": brand, "model": model})
         idx += 1
-    if not items:
-        items = []
-    for item in items:
-        db.add(item)
-    db.flush()
     new_outfit = models.Outfit(
         title=title,
         description=description,
-        image_url=image_url,
-        category_id=category_id,
-        items=items
+        image_url=stored.url,
+        image_variants=None if stored.created else await run_in_threadpool(images.existing_variants, stored.path),
+        category_id=category_id
     )
     db.add(new_outfit)
-    db.commit()
-    db.refresh(new_outfit)
-    return new_outfit
+    await db.flush()
+    await set_items(db, new_outfit.id, items)
+    outfit = await load_outfit(db, new_outfit.id)
+    search.index_outfit(outfit)
+    await db.commit()
+    pagination.outfit_counts.invalidate()
+    await cache.response_cache.ainvalidate("outfits")
+    if outfit.image_variants is None:
+        images.schedule_variants(outfit.id, stored.path)
+    similarity.schedule_features(outfit.id, stored.path)
+    return outfit
+
+# Вещи аутфита из каталога: существующие переиспользуются, меняются только затронутые связи.
+# Возвращает id вещей, отвязанных от аутфита (кандидаты на удаление из каталога)
+async def set_items(db: AsyncSession, outfit_id: int, items) -> list[int]:
+    item_ids = await db.run_sync(catalog.resolve_item_ids, items)
+    _, removed = await db.run_sync(catalog.set_outfit_items, outfit_id, item_ids)
+    return removed
 
-# Обновить аутфит (только администратор)
+# Применить изменения полей и (если передан) нового списка вещей; пересобирает поисковый документ
+async def apply_outfit_changes(db: AsyncSession, outfit_id: int, changes: dict, items, background_tasks: BackgroundTasks) -> models.Outfit:
+    db_outfit = await db.get(models.Outfit, outfit_id)
+    if not db_outfit:
+        raise HTTPException(status_code=404, detail="Outfit not found")
+    # Новое изображение: варианты и вектор признаков старого больше не подходят
+    image_changed = "image_url" in changes and db_outfit.image_url != changes["image_url"]
+    image_path = None
+    if image_changed:
+        image_path = await run_in_threadpool(similarity.image_path, changes["image_url"])
+        db_outfit.image_variants = await run_in_threadpool(images.existing_variants, image_path) if image_path else None # type: ignore
+    for field, value in changes.items():
+        setattr(db_outfit, field, value)
+    removed = await set_items(db, outfit_id, items) if items is not None else []
+    await db.flush()
+    outfit = await load_outfit(db, outfit_id)
+    search.index_outfit(outfit)
+    await db.commit()
+    pagination.outfit_counts.invalidate()
+    await cache.response_cache.ainvalidate("outfits", f"outfit:{outfit_id}")
+    if removed:
+        background_tasks.add_task(catalog.collect_orphans_job, removed)
+    if image_path is not None:
+        if outfit.image_variants is None:
+            images.schedule_variants(outfit_id, image_path)
+        similarity.schedule_features(outfit_id, image_path)
+    elif image_changed:
+        # Внешний URL или изображение убрано: похожие по старой картинке больше не ищутся
+        await run_in_threadpool(similarity.feature_index.remove, outfit_id)
+    return outfit
+
+# Обновить аутфит целиком (только администратор)
 @router.put("/{outfit_id}", response_model=schemas.Outfit)
-def update_outfit(outfit_id: int, outfit: schemas.OutfitBase, db: Session = Depends(database.get_db), user=Depends(auth.get_current_user)):
+async def update_outfit(outfit_id: int, outfit: schemas.OutfitBase, background_tasks: BackgroundTasks, db: AsyncSession = Depends(database.get_async_db), user=Depends(auth.get_current_user)):
     # Проверяем, является ли пользователь администратором
     if not user.is_admin:
         raise HTTPException(status_code=403, detail="Only administrators can update outfits")
-    
-    db_outfit = db.query(models.Outfit).filter(models.Outfit.id == outfit_id).first()
-    if not db_outfit:
-        raise HTTPException(status_code=404, detail="Outfit not found")
-    # Обновляем поля аутфита
-    db_outfit.title = outfit.title # type: ignore
-    db_outfit.description = outfit.description # type: ignore
-    db_outfit.image_url = outfit.image_url # type: ignore
-    db_outfit.category_id = outfit.category_id # type: ignore
-    # Заменяем список вещей
-    db_outfit.items.clear()
-    for item_data in outfit.items:
-        item = models.Item(name=item_data.name, brand=item_data.brand, model=item_data.model)
-        db.add(item)
-        db_outfit.items.append(item)
-    db.commit()
-    db.refresh(db_outfit)
-    return db_outfit
+    changes = outfit.model_dump(exclude={"items"})
+    return await apply_outfit_changes(db, outfit_id, changes, outfit.items, background_tasks)
+
+# Частично обновить аутфит (только администратор): меняются только переданные поля,
+# items — новый полный список вещей, в outfit_items применяется только разница
+@router.patch("/{outfit_id}", response_model=schemas.Outfit)
+async def patch_outfit(outfit_id: int, outfit: schemas.OutfitPatch, background_tasks: BackgroundTasks, db: AsyncSession = Depends(database.get_async_db), user=Depends(auth.get_current_user)):
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Only administrators can update outfits")
+    changes = outfit.model_dump(exclude={"items"}, exclude_unset=True)
+    return await apply_outfit_changes(db, outfit_id, changes, outfit.items, background_tasks)
 
 # Удалить аутфит (только администратор)
 @router.delete("/{outfit_id}")
-def delete_outfit(outfit_id: int, db: Session = Depends(database.get_db), user=Depends(auth.get_current_user)):
+async def delete_outfit(outfit_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(database.get_async_db), user=Depends(auth.get_current_user)):
     # Проверяем, является ли пользователь администратором
     if not user.is_admin:
         raise HTTPException(status_code=403, detail="Only administrators can delete outfits")
     
-    db_outfit = db.query(models.Outfit).filter(models.Outfit.id == outfit_id).first()
+    db_outfit = await db.get(models.Outfit, outfit_id)
     if not db_outfit:
         raise HTTPException(status_code=404, detail="Outfit not found")
-    db.delete(db_outfit)
-    db.commit()
+    item_ids = await db.run_sync(catalog.outfit_item_ids, outfit_id)
+    neighbors = await recommendations.remove_outfit(db, outfit_id)
+    await db.delete(db_outfit)
+    await db.commit()
+    background_tasks.add_task(catalog.collect_orphans_job, item_ids)
+    if neighbors:
+        background_tasks.add_task(recommendations.refresh_job, neighbors)
+    search.unindex_outfit(outfit_id)
+    await run_in_threadpool(similarity.feature_index.remove, outfit_id)
+    pagination.outfit_counts.invalidate()
+    await cache.response_cache.ainvalidate("outfits", f"outfit:{outfit_id}")
     return {"detail": "Outfit deleted"} 
\ No newline at end of file
@@ -1,33 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 from . import models, schemas, auth, database
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# bcrypt выполняется в пуле процессов auth, не блокируя цикл событий
+
 # Регистрация пользователя
 @router.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter((models.User.username == user.username) | (models.User.email == user.email)).first()
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(database.get_async_db)):
+    db_user = await db.scalar(select(models.User).where((models.User.username == user.username) | (models.User.email == user.email)))
     if db_user:
         raise HTTPException(status_code=400, detail="Username or email already registered")
-    hashed_password = auth.get_password_hash(user.password)
-    new_user = models.User(username=user.username, email=user.email, hashed_password=hashed_password)
+    hashed_password = await auth.get_password_hash_async(user.password)
+    new_user = models.User(username=user.username, email=user.email, hashed_password=hashed_password, favorites=[])
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     return new_user
 
 # Логин пользователя
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    if not user or not auth.verify_password(form_data.password, str(user.hashed_password)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(database.get_async_db)):
+    user = await db.scalar(select(models.User).where(models.User.username == form_data.username))
+    if not user or not await auth.verify_password_async(form_data.password, str(user.hashed_password)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
     access_token = auth.create_access_token(data={"sub": str(user.id)})
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Получение текущего пользователя (пример защищённого маршрута)
-@router.get("/me", response_model=schemas.User)
-def get_me(current_user: models.User = Depends(auth.get_current_user)):
-    return current_user 
\ No newline at end of file
+@router.get("/me", response_model=schemas.User, dependencies=[Depends(database.query_budget(4))])
+async def get_me(current_user: auth.Principal = Depends(auth.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    user = await db.scalar(select(models.User).options(*models.user_load_options()).where(models.User.id == current_user.id))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+# Всё, что нужно странице при загрузке (пользователь, id избранного, категории), одним запросом вместо трёх-четырёх
+@router.get("/me/bootstrap", response_model=schemas.Bootstrap, dependencies=[Depends(database.query_budget(3))])
+async def get_bootstrap(current_user: auth.Principal = Depends(auth.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    favorite_ids = (await db.scalars(
+        select(models.favorites.c.outfit_id).where(models.favorites.c.user_id == current_user.id).order_by(models.favorites.c.outfit_id)
+    )).all()
+    categories = (await db.scalars(select(models.Category).order_by(models.Category.id))).all()
+    return {"user": current_user, "favorite_ids": favorite_ids, "categories": categories}
+
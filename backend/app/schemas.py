@@ -1,5 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
 
 class ItemBase(BaseModel):
     name: str
@@ -26,13 +28,48 @@ class OutfitBase(BaseModel):
     category_id: int
     items: List[ItemBase] = []
 
+class OutfitPatch(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    category_id: Optional[int] = None
+    items: Optional[List[ItemBase]] = None
+
+    # Не переданное поле не меняется; null можно передать только для полей, которые допускают пустое значение
+    @field_validator("title", "category_id", "items")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
 class Outfit(OutfitBase):
     id: int
     items: List[Item] = []
     category: Category
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
     class Config:
         from_attributes = True
 
+# Страница списка: total — число строк (None, если не запрашивалось), next_cursor — курсор следующей страницы
+class Page(BaseModel, Generic[T]):
+    total: Optional[int] = None
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+# Ответ batch-запроса: найденные объекты в порядке запрошенных id и id, которых нет
+class Batch(BaseModel, Generic[T]):
+    items: List[T]
+    missing: List[int] = []
+
+class PopularOutfit(Outfit):
+    favorites_count: int = 0
+
+class FavoriteIds(BaseModel):
+    outfit_ids: List[int] = Field(..., min_length=1, max_length=500)
+
 class UserBase(BaseModel):
     username: str
     email: EmailStr
@@ -45,4 +82,16 @@ class User(UserBase):
     is_admin: bool
     favorites: List[Outfit] = []
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class UserSummary(UserBase):
+    id: int
+    is_admin: bool
+    class Config:
+        from_attributes = True
+
+# Данные, общие для страниц приложения: пользователь, id избранного и категории — одним запросом
+class Bootstrap(BaseModel):
+    user: UserSummary
+    favorite_ids: List[int]
+    categories: List[Category]
@@ -0,0 +1,179 @@
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Iterable, Optional
+from sqlalchemy import func, or_, text
+from sqlalchemy.orm import Session, selectinload
+from . import models
+
+# Полнотекстовый поиск по аутфитам: название, описание и вещи (name/brand/model).
+# Текст вещей денормализован в Outfit.search_text, поэтому поиск не ходит в items через outfit_items.
+# В PostgreSQL работают GIN-индексы (tsvector + pg_trgm, см. models.py),
+# в остальных СУБД (SQLite в тестах) — инвертированный индекс в памяти процесса
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+TITLE_WEIGHT = 3.0
+BODY_WEIGHT = 1.0
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return TOKEN_RE.findall((text or "").lower())
+
+# items — объекты Item или словари с ключами name/brand/model (массовый импорт)
+def document_text(description: Optional[str], items: Iterable) -> str:
+    parts = [description or ""]
+    for item in items:
+        values = (item.get("name"), item.get("brand"), item.get("model")) if isinstance(item, dict) else (item.name, item.brand, item.model)
+        parts.extend(filter(None, values))
+    return " ".join(parts)
+
+def build_search_text(outfit: models.Outfit) -> str:
+    return document_text(outfit.description, outfit.items)
+
+# Обновить поисковый документ аутфита (вызывается до commit) и индекс в памяти
+def index_outfit(outfit: models.Outfit):
+    outfit.search_text = build_search_text(outfit)
+    if outfit_index.built:
+        outfit_index.add(outfit.id, outfit.title, outfit.search_text)
+
+def unindex_outfit(outfit_id: int):
+    if outfit_index.built:
+        outfit_index.remove(outfit_id)
+
+class InvertedIndex:
+    def __init__(self):
+        self.built = False
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._documents: dict[int, set[str]] = {}
+        self._terms: list[str] = []
+        self._lock = threading.RLock()
+
+    def build(self, documents: Iterable[tuple[int, str, str]]):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            for outfit_id, title, body in documents:
+                self._add(outfit_id, title, body)
+            self._terms = sorted(self._postings)
+            self.built = True
+
+    def add(self, outfit_id: int, title: str, body: str):
+        with self._lock:
+            self._remove(outfit_id)
+            self._add(outfit_id, title, body)
+            self._terms = sorted(self._postings)
+
+    def remove(self, outfit_id: int):
+        with self._lock:
+            self._remove(outfit_id)
+            self._terms = sorted(self._postings)
+
+    def _add(self, outfit_id: int, title: str, body: str):
+        weights: dict[str, float] = defaultdict(float)
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(body):
+            weights[token] += BODY_WEIGHT
+        for token, weight in weights.items():
+            self._postings[token][outfit_id] = weight
+        self._documents[outfit_id] = set(weights)
+
+    def _remove(self, outfit_id: int):
+        for token in self._documents.pop(outfit_id, ()):
+            postings = self._postings[token]
+            postings.pop(outfit_id, None)
+            if not postings:
+                del self._postings[token]
+
+    # Термины словаря, начинающиеся с prefix: бинарный поиск по отсортированному словарю
+    def expand(self, prefix: str) -> list[str]:
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + "\uffff")
+        return self._terms[start:end]
+
+    # Каждое слово запроса должно совпасть (как префикс) хотя бы с одним термином документа;
+    # документы ранжируются по сумме весов совпавших терминов с поправкой idf
+    def search(self, query: str) -> list[int]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            total = max(len(self._documents), 1)
+            scores: Optional[dict[int, float]] = None
+            for token in tokens:
+                token_scores: dict[int, float] = defaultdict(float)
+                for term in self.expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    exact_bonus = 1.0 if term == token else 0.5
+                    for outfit_id, weight in postings.items():
+                        token_scores[outfit_id] += weight * idf * exact_bonus
+                if scores is None:
+                    scores = dict(token_scores)
+                else:
+                    scores = {outfit_id: score + token_scores[outfit_id] for outfit_id, score in scores.items() if outfit_id in token_scores}
+                if not scores:
+                    return []
+        return sorted(scores, key=lambda outfit_id: (-scores[outfit_id], outfit_id))
+
+outfit_index = InvertedIndex()
+
+def _ensure_built(db: Session):
+    if outfit_index.built:
+        return
+    outfits = db.query(models.Outfit).options(selectinload(models.Outfit.items)).all()
+    outfit_index.build((outfit.id, outfit.title, build_search_text(outfit)) for outfit in outfits)
+
+def _postgres_search(db: Session, query: str, category_id: Optional[int], limit: int, offset: int) -> tuple[int, list[int]]:
+    tokens = tokenize(query)
+    if not tokens:
+        return 0, []
+    # Каждое слово ищется как префикс: "nik air" -> nik:* & air:*
+    tsquery = func.to_tsquery(text("'simple'"), " & ".join(f"{token}:*" for token in tokens))
+    # Выражение совпадает с индексом ix_outfits_search_tsv, подстрока в названии ищется по ix_outfits_title_trgm
+    vector = models.outfit_search_vector()
+    condition = or_(vector.op("@@")(tsquery), models.Outfit.title.icontains(query, autoescape=True))
+    base = db.query(models.Outfit.id).filter(condition)
+    if category_id:
+        base = base.filter(models.Outfit.category_id == category_id)
+    total = base.count()
+    rank = func.ts_rank(vector, tsquery) + func.similarity(models.Outfit.title, query)
+    ids = [row.id for row in base.order_by(rank.desc(), models.Outfit.id).offset(offset).limit(limit)]
+    return total, ids
+
+def _memory_search(db: Session, query: str, category_id: Optional[int], limit: int, offset: int) -> tuple[int, list[int]]:
+    _ensure_built(db)
+    ids = outfit_index.search(query)
+    if category_id:
+        allowed = {row.id for row in db.query(models.Outfit.id).filter(models.Outfit.id.in_(ids), models.Outfit.category_id == category_id)}
+        ids = [outfit_id for outfit_id in ids if outfit_id in allowed]
+    return len(ids), ids[offset:offset + limit]
+
+# Найти аутфиты: (всего совпадений, аутфиты страницы в порядке релевантности)
+def search_outfits(db: Session, query: str, category_id: Optional[int] = None, limit: int = 12, offset: int = 0) -> tuple[int, list[models.Outfit]]:
+    if db.get_bind().dialect.name == "postgresql":
+        total, ids = _postgres_search(db, query, category_id, limit, offset)
+    else:
+        total, ids = _memory_search(db, query, category_id, limit, offset)
+    if not ids:
+        return total, []
+    outfits = db.query(models.Outfit).options(*models.outfit_load_options()).filter(models.Outfit.id.in_(ids)).all()
+    by_id = {outfit.id: outfit for outfit in outfits}
+    return total, [by_id[outfit_id] for outfit_id in ids if outfit_id in by_id]
+
+# Заполнить search_text для уже существующих аутфитов: python -m app.search
+def reindex_all():
+    from . import database
+
+    db = database.SessionLocal()
+    try:
+        outfits = db.query(models.Outfit).options(selectinload(models.Outfit.items)).all()
+        for outfit in outfits:
+            outfit.search_text = build_search_text(outfit)
+        db.commit()
+        print(f"Переиндексировано аутфитов: {len(outfits)}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    reindex_all()
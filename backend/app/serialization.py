@@ -0,0 +1,29 @@
+import json
+from typing import Any
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+# Быстрая сериализация ответов: pydantic-модель пишется в JSON сразу в Rust (model_dump_json),
+# остальное — через orjson (если установлен) без промежуточного jsonable_encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(value: Any) -> bytes:
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode()
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,207 @@
+import fcntl
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+import numpy as np
+from . import images, storage
+
+logger = logging.getLogger("outfitted.similarity")
+
+# Вектор признаков изображения: цветовая гистограмма HSV (8x4x4) и перцептивный dHash (64 бита).
+# Векторы L2-нормированы, поэтому косинусная близость — просто скалярное произведение
+HIST_BINS = (8, 4, 4)
+HASH_SIZE = 8
+HASH_WEIGHT = 0.5
+FEATURE_DIM = HIST_BINS[0] * HIST_BINS[1] * HIST_BINS[2] + HASH_SIZE * HASH_SIZE
+
+FEATURES_DIR = os.getenv("FEATURES_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), '../data')))
+MATRIX_PATH = os.path.join(FEATURES_DIR, "features.f32")
+IDS_PATH = os.path.join(FEATURES_DIR, "feature_ids.npy")
+
+def compute_features(path: str) -> np.ndarray:
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    # Гистограмма по HSV устойчивее к освещению, чем по RGB; sqrt сглаживает доминирующий фон
+    hsv = np.asarray(image.resize((64, 64)).convert("HSV"), dtype=np.uint16)
+    bins = np.array(HIST_BINS, dtype=np.uint16)
+    quantized = hsv * bins // 256
+    flat = (quantized[..., 0] * bins[1] + quantized[..., 1]) * bins[2] + quantized[..., 2]
+    histogram = np.bincount(flat.ravel(), minlength=int(bins.prod())).astype(np.float32)
+    histogram = np.sqrt(histogram / histogram.sum())
+    # dHash: знак разности соседних пикселей уменьшенного серого изображения
+    gray = np.asarray(image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE)), dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).astype(np.float32).ravel() * 2 - 1
+    bits *= HASH_WEIGHT / np.sqrt(bits.size)
+    vector = np.concatenate([histogram, bits])
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+# Путь к исходному файлу аутфита по image_url
+def image_path(image_url: Optional[str]) -> Optional[str]:
+    if not image_url or not image_url.startswith(images.IMAGES_URL + "/"):
+        return None
+    relative = image_url[len(images.IMAGES_URL) + 1:]
+    path = storage.resolve(relative)
+    if path is None:
+        fallback = os.path.join(images.SOURCE_IMAGES_DIR, os.path.basename(relative))
+        path = fallback if os.path.isfile(fallback) else None
+    return path
+
+# Матрица признаков (N x FEATURE_DIM, float32) хранится в файле и отображается в память;
+# рядом лежит массив id аутфитов по строкам. Удалённые строки помечаются id = -1.
+# Если файлы обновил другой воркер (сменились mtime или inode файла ids), индекс перечитывается при следующем запросе.
+# Изменения (чтение ids -> запись строки -> сохранение ids) выполняются под файловой блокировкой,
+# общей для всех процессов: иначе два воркера могли бы дописать две строки и сохранить один id
+ROW_BYTES = FEATURE_DIM * np.dtype(np.float32).itemsize
+
+class FeatureIndex:
+    def __init__(self, matrix_path: str = MATRIX_PATH, ids_path: str = IDS_PATH):
+        self.matrix_path = matrix_path
+        self.ids_path = ids_path
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, FEATURE_DIM), dtype=np.float32)
+        self._rows: dict[int, int] = {}
+        self._loaded_version: Optional[tuple[int, int]] = None
+        self._lock = threading.RLock()
+
+    def _version(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(self.ids_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino)
+
+    # Вызывается под файловой блокировкой: иначе можно прочитать ids одной версии и матрицу другой
+    def _load(self):
+        version = self._version()
+        if version == self._loaded_version:
+            return
+        if version is None:
+            self.ids = np.empty(0, dtype=np.int64)
+            self.matrix = np.empty((0, FEATURE_DIM), dtype=np.float32)
+        else:
+            self.ids = np.load(self.ids_path)
+            self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(len(self.ids), FEATURE_DIM)) if len(self.ids) else np.empty((0, FEATURE_DIM), dtype=np.float32)
+        self._rows = {int(outfit_id): row for row, outfit_id in enumerate(self.ids) if outfit_id >= 0}
+        self._loaded_version = version
+
+    @contextmanager
+    def _file_lock(self, operation: int):
+        os.makedirs(os.path.dirname(self.matrix_path), exist_ok=True)
+        with open(self.ids_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._load()
+            yield
+
+    def _save_ids(self, ids: np.ndarray):
+        tmp_path = self.ids_path + ".tmp.npy"
+        np.save(tmp_path, ids)
+        os.replace(tmp_path, self.ids_path)
+        self._load()
+
+    # Полная перезапись индекса (пакетный расчёт). Матрица пишется в новый файл и подменяет старую через
+    # os.replace: другие воркеры держат старый файл отображённым в память, и его усечение уронило бы их с SIGBUS
+    def rebuild(self, ids: np.ndarray, matrix: np.ndarray):
+        with self._locked():
+            tmp_path = self.matrix_path + ".tmp"
+            np.ascontiguousarray(matrix, dtype=np.float32).tofile(tmp_path)
+            os.replace(tmp_path, self.matrix_path)
+            self._save_ids(np.asarray(ids, dtype=np.int64))
+
+    def upsert(self, outfit_id: int, vector: np.ndarray):
+        with self._locked():
+            vector = np.ascontiguousarray(vector, dtype=np.float32)
+            row = self._rows.get(outfit_id)
+            if row is not None:
+                ids = self.ids.copy()
+            else:
+                row = len(self.ids)
+                ids = np.append(self.ids, outfit_id)
+            # Строка пишется по смещению своего номера. Файл не усекается (он отображён в память у других воркеров):
+            # хвост от прерванной записи перезапишется следующей строкой, а за пределы len(ids) строк никто не читает
+            with open(self.matrix_path, "r+b" if os.path.exists(self.matrix_path) else "w+b") as f:
+                f.seek(row * ROW_BYTES)
+                f.write(vector.tobytes())
+            self._save_ids(ids)
+
+    def remove(self, outfit_id: int):
+        with self._locked():
+            row = self._rows.get(outfit_id)
+            if row is not None:
+                ids = self.ids.copy()
+                ids[row] = -1
+                self._save_ids(ids)
+
+    # Top-k ближайших аутфитов одним умножением матрицы на вектор
+    def similar(self, outfit_id: int, k: int) -> list[tuple[int, float]]:
+        with self._lock:
+            if self._version() != self._loaded_version:
+                with self._file_lock(fcntl.LOCK_SH):
+                    self._load()
+            row = self._rows.get(outfit_id)
+            if row is None:
+                return []
+            ids, matrix = self.ids, self.matrix
+        scores = matrix @ matrix[row]
+        scores[row] = -np.inf
+        scores[ids < 0] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+feature_index = FeatureIndex()
+
+# Расчёт признаков нового изображения в пуле процессов обработки изображений
+def schedule_features(outfit_id: int, source_path: str) -> Future:
+    future = images.get_executor().submit(compute_features, source_path)
+    future.add_done_callback(lambda f: _store_features(outfit_id, f))
+    return future
+
+def _store_features(outfit_id: int, future: Future):
+    try:
+        feature_index.upsert(outfit_id, future.result())
+    except Exception:
+        logger.exception("Failed to compute image features for outfit %s", outfit_id)
+
+def _compute_for(path: str) -> Optional[np.ndarray]:
+    try:
+        return compute_features(path)
+    except Exception:
+        return None
+
+# Пакетный расчёт для всего каталога: python -m app.similarity [число процессов]
+def build_all(workers: int = os.cpu_count() or 1):
+    from . import models, database
+
+    db = database.SessionLocal()
+    try:
+        rows = [(outfit_id, image_path(image_url)) for outfit_id, image_url in db.query(models.Outfit.id, models.Outfit.image_url)]
+    finally:
+        db.close()
+    rows = [(outfit_id, path) for outfit_id, path in rows if path is not None]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        vectors = list(pool.map(_compute_for, [path for _, path in rows], chunksize=4))
+    pairs = [(outfit_id, vector) for (outfit_id, _), vector in zip(rows, vectors) if vector is not None]
+    ids = np.array([outfit_id for outfit_id, _ in pairs], dtype=np.int64)
+    matrix = np.stack([vector for _, vector in pairs]) if pairs else np.empty((0, FEATURE_DIM), dtype=np.float32)
+    feature_index.rebuild(ids, matrix)
+    print(f"Векторы признаков: {len(ids)} аутфитов, размерность {FEATURE_DIM}")
+
+if __name__ == "__main__":
+    build_all(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1)
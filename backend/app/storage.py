@@ -0,0 +1,98 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import BinaryIO, Optional
+from uuid import uuid4
+import anyio
+from fastapi import UploadFile
+from . import images
+
+# Контентно-адресуемое хранилище изображений: имя файла — sha256 содержимого.
+# Повторная загрузка того же файла не создаёт копию, а сам файл по имени никогда
+# не меняется, поэтому его можно кэшировать навсегда (Cache-Control: immutable)
+CONTENT_NAME_RE = re.compile(r"^[0-9a-f]{64}(_[a-z]+)?\.[a-z0-9]+$")
+
+@dataclass
+class StoredImage:
+    digest: str
+    path: str
+    url: str
+    created: bool
+
+def normalize_extension(filename: Optional[str]) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == ".jpeg":
+        ext = ".jpg"
+    if ext not in images.IMAGE_EXTENSIONS:
+        ext = ".jpg"
+    return ext
+
+# Пишем во временный файл, попутно считая хэш, и атомарно переименовываем в итоговое имя
+def store_stream(stream: BinaryIO, ext: str, directory: str = images.IMAGES_DIR, url_prefix: str = images.IMAGES_URL) -> StoredImage:
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".upload-{uuid4().hex}.tmp")
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, "wb") as f:
+            while chunk := stream.read(images.CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+        name = f"{digest.hexdigest()}{ext}"
+        path = os.path.join(directory, name)
+        created = not os.path.exists(path)
+        if created:
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return StoredImage(digest=digest.hexdigest(), path=path, url=f"{url_prefix}/{name}", created=created)
+
+# Асинхронный вариант для эндпоинтов: чтение загрузки и запись на диск не блокируют цикл событий
+async def store_upload(upload: UploadFile, directory: str = images.IMAGES_DIR, url_prefix: str = images.IMAGES_URL) -> StoredImage:
+    await anyio.to_thread.run_sync(lambda: os.makedirs(directory, exist_ok=True))
+    ext = normalize_extension(upload.filename)
+    tmp_path = anyio.Path(directory, f".upload-{uuid4().hex}.tmp")
+    digest = hashlib.sha256()
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as f:
+            while chunk := await upload.read(images.CHUNK_SIZE):
+                digest.update(chunk)
+                await f.write(chunk)
+        name = f"{digest.hexdigest()}{ext}"
+        path = anyio.Path(directory, name)
+        created = not await path.exists()
+        if created:
+            await tmp_path.replace(path)
+    finally:
+        if await tmp_path.exists():
+            await tmp_path.unlink()
+    return StoredImage(digest=digest.hexdigest(), path=str(path), url=f"{url_prefix}/{name}", created=created)
+
+def is_content_addressed(name: str) -> bool:
+    return CONTENT_NAME_RE.match(name) is not None
+
+# Путь к файлу по части URL после /images/outfits/; None, если файла нет или путь выходит за хранилище
+def resolve(relative_path: str) -> Optional[str]:
+    path = os.path.abspath(os.path.join(images.IMAGES_DIR, relative_path))
+    if not path.startswith(images.IMAGES_DIR + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+# Сильный ETag: для контентно-адресуемых файлов это хэш из имени,
+# для остальных (старые uuid-имена) — хэш содержимого, посчитанный один раз на версию файла
+def strong_etag(path: str) -> str:
+    name = os.path.basename(path)
+    if is_content_addressed(name):
+        return f'"{os.path.splitext(name)[0]}"'
+    stat = os.stat(path)
+    return f'"{_file_digest(path, stat.st_size, stat.st_mtime)}"'
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, size: int, mtime: float) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(images.CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()
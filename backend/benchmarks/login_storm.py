@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# p99 авторизованного эндпоинта (GET /favorites/) во время шквала логинов.
+# Запуск из папки backend: python benchmarks/login_storm.py --logins 200 --concurrency 50
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+async def main(args):
+    import httpx
+    from app.main import app
+    from app import auth, database, models, migrate
+
+    migrate.upgrade()
+    db = database.SessionLocal()
+    hashed = auth.get_password_hash("password")
+    db.add_all(models.User(username=f"user{i}", email=f"user{i}@example.com", hashed_password=hashed) for i in range(args.users))
+    db.commit()
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/users/login", data={"username": "user0", "password": "password"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        latencies: list[float] = []
+        login_latencies: list[float] = []
+        storm_running = True
+
+        async def reader():
+            while storm_running:
+                started = time.perf_counter()
+                response = await client.get("/favorites/", headers=headers)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(args.interval)
+
+        async def login(i: int, semaphore: asyncio.Semaphore):
+            async with semaphore:
+                started = time.perf_counter()
+                await client.post("/users/login", data={"username": f"user{i % args.users}", "password": "password"})
+                login_latencies.append(time.perf_counter() - started)
+
+        readers = [asyncio.create_task(reader()) for _ in range(args.readers)]
+        semaphore = asyncio.Semaphore(args.concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i, semaphore) for i in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        storm_running = False
+        await asyncio.gather(*readers)
+
+    print(f"логины: {args.logins} за {elapsed:.2f} с ({args.logins / elapsed:.1f}/с), p99 {percentile(login_latencies, 99) * 1000:.1f} мс")
+    print(f"GET /favorites/: {len(latencies)} запросов, "
+          f"p50 {statistics.median(latencies) * 1000:.1f} мс, "
+          f"p95 {percentile(latencies, 95) * 1000:.1f} мс, "
+          f"p99 {percentile(latencies, 99) * 1000:.1f} мс")
+    auth.shutdown_password_executor()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.02, help="пауза читателя между запросами, с")
+    args = parser.parse_args()
+    # Всегда отдельная временная SQLite-база: бенчмарк создаёт пользователей с известным паролем,
+    # поэтому DATABASE_URL/ASYNC_DATABASE_URL из окружения не используются
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    asyncio.run(main(args))
@@ -0,0 +1,73 @@
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+# Время холодного старта воркера: импорт приложения и время до первого обслуженного запроса
+# (uvicorn в отдельном процессе, первый запрос — к эндпоинту с обращением к БД).
+# Запуск из папки backend: python benchmarks/startup_time.py --runs 5
+# Код возврата 1, если медиана превышает цель — проверка для CI и настроек автомасштабирования
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import(env: dict) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+# От запуска процесса до первого успешного ответа GET /categories/
+def measure_first_request(env: dict, timeout: float) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/categories/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"server did not answer within {timeout} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main(args):
+    env = dict(os.environ)
+    # Бенчмарк применяет миграции, поэтому база из окружения не используется: временная SQLite
+    # или явно указанная --database-url
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/startup.db"
+    env.pop("ASYNC_DATABASE_URL", None)
+    subprocess.run([sys.executable, "-m", "app.migrate"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+
+    import_times = [measure_import(env) for _ in range(args.runs)]
+    ready_times = [measure_first_request(env, args.timeout) for _ in range(args.runs)]
+    import_median, ready_median = statistics.median(import_times), statistics.median(ready_times)
+    print(f"импорт app.main: медиана {import_median:.2f} с (мин {min(import_times):.2f}, макс {max(import_times):.2f}), цель {args.import_target:.2f} с")
+    print(f"первый запрос: медиана {ready_median:.2f} с (мин {min(ready_times):.2f}, макс {max(ready_times):.2f}), цель {args.ready_target:.2f} с")
+    if import_median > args.import_target or ready_median > args.ready_target:
+        print("Цель по времени старта не выполнена")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-target", type=float, default=2.0, help="цель для импорта приложения, с")
+    parser.add_argument("--ready-target", type=float, default=3.0, help="цель до первого ответа, с")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--database-url", help="база для замера (по умолчанию временная SQLite); к ней применяются миграции")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,41 @@
+from logging.config import fileConfig
+from alembic import context
+from app import database, models
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = database.Base.metadata
+
+# Индексы с ddl_if(dialect=...) (поисковые индексы PostgreSQL) сравниваются только на своём диалекте
+def include_object(obj, name, type_, reflected, compare_to):
+    ddl_if = getattr(obj, "_ddl_if", None)
+    return ddl_if is None or ddl_if.dialect in (None, context.get_context().dialect.name)
+
+# render_as_batch: SQLite не умеет ALTER большинства ограничений, alembic пересоздаёт таблицу
+def configure(**kwargs):
+    context.configure(target_metadata=target_metadata, render_as_batch=True, compare_type=True, include_object=include_object, **kwargs)
+
+def run_migrations_offline():
+    configure(url=database.SQLALCHEMY_DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+# Соединение передаёт app.migrate (уже под блокировкой); при запуске через alembic CLI открываем своё
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    with database.engine.connect() as connection:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,69 @@
+"""Исходная схема (как создавал Base.metadata.create_all до появления миграций)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('is_admin', sa.Boolean()),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_table(
+        'categories',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False, unique=True),
+    )
+    op.create_index('ix_categories_id', 'categories', ['id'])
+    op.create_table(
+        'outfits',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('image_url', sa.String()),
+        sa.Column('category_id', sa.Integer(), sa.ForeignKey('categories.id')),
+    )
+    op.create_index('ix_outfits_id', 'outfits', ['id'])
+    op.create_table(
+        'items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('brand', sa.String()),
+        sa.Column('model', sa.String()),
+    )
+    op.create_index('ix_items_id', 'items', ['id'])
+    op.create_table(
+        'outfit_items',
+        sa.Column('outfit_id', sa.Integer(), sa.ForeignKey('outfits.id')),
+        sa.Column('item_id', sa.Integer(), sa.ForeignKey('items.id')),
+    )
+    op.create_table(
+        'favorites',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('outfit_id', sa.Integer(), sa.ForeignKey('outfits.id')),
+    )
+
+
+def downgrade():
+    op.drop_table('favorites')
+    op.drop_table('outfit_items')
+    op.drop_table('items')
+    op.drop_table('outfits')
+    op.drop_table('categories')
+    op.drop_table('users')
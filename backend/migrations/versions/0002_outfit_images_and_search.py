@@ -0,0 +1,58 @@
+"""Уменьшенные копии изображений, поисковый документ и индексы каталога
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from collections import defaultdict
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = (
+    "(setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(search_text, '')), 'B'))"
+)
+
+
+def upgrade():
+    with op.batch_alter_table('outfits') as batch_op:
+        batch_op.add_column(sa.Column('image_variants', sa.JSON()))
+        batch_op.add_column(sa.Column('search_text', sa.Text()))
+    op.create_index('ix_outfits_category_id_id', 'outfits', ['category_id', 'id'])
+
+    # search_text: описание и вещи одной строкой, как search.build_search_text
+    bind = op.get_bind()
+    parts = defaultdict(list)
+    for outfit_id, description in bind.execute(sa.text("SELECT id, description FROM outfits")):
+        parts[outfit_id].append(description or "")
+    items = bind.execute(sa.text(
+        "SELECT oi.outfit_id, i.name, i.brand, i.model FROM outfit_items oi JOIN items i ON i.id = oi.item_id ORDER BY i.id"
+    ))
+    for outfit_id, *values in items:
+        if outfit_id in parts:
+            parts[outfit_id].extend(filter(None, values))
+    if parts:
+        bind.execute(
+            sa.text("UPDATE outfits SET search_text = :search_text WHERE id = :outfit_id"),
+            [{"outfit_id": outfit_id, "search_text": " ".join(values)} for outfit_id, values in parts.items()]
+        )
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_outfits_search_tsv', 'outfits', [sa.text(SEARCH_VECTOR)], postgresql_using='gin')
+        op.create_index('ix_outfits_title_trgm', 'outfits', ['title'], postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_outfits_title_trgm', table_name='outfits')
+        op.drop_index('ix_outfits_search_tsv', table_name='outfits')
+    op.drop_index('ix_outfits_category_id_id', table_name='outfits')
+    with op.batch_alter_table('outfits') as batch_op:
+        batch_op.drop_column('search_text')
+        batch_op.drop_column('image_variants')
@@ -0,0 +1,50 @@
+"""Первичный ключ избранного и счётчик Outfit.favorites_count
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Таблица пересоздаётся: повторные строки схлопываются, появляются составной ключ и каскадное удаление
+    op.create_table(
+        'favorites_new',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE', name='favorites_user_id_fkey'), primary_key=True),
+        sa.Column('outfit_id', sa.Integer(), sa.ForeignKey('outfits.id', ondelete='CASCADE', name='favorites_outfit_id_fkey'), primary_key=True),
+        sa.PrimaryKeyConstraint('user_id', 'outfit_id', name='favorites_pkey'),
+    )
+    op.execute(
+        "INSERT INTO favorites_new (user_id, outfit_id) "
+        "SELECT DISTINCT user_id, outfit_id FROM favorites WHERE user_id IS NOT NULL AND outfit_id IS NOT NULL"
+    )
+    op.drop_table('favorites')
+    op.rename_table('favorites_new', 'favorites')
+    op.create_index('ix_favorites_outfit_id', 'favorites', ['outfit_id'])
+
+    with op.batch_alter_table('outfits') as batch_op:
+        batch_op.add_column(sa.Column('favorites_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute("UPDATE outfits SET favorites_count = (SELECT count(*) FROM favorites WHERE favorites.outfit_id = outfits.id)")
+    op.create_index('ix_outfits_favorites_count_id', 'outfits', ['favorites_count', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_outfits_favorites_count_id', table_name='outfits')
+    with op.batch_alter_table('outfits') as batch_op:
+        batch_op.drop_column('favorites_count')
+    op.drop_index('ix_favorites_outfit_id', table_name='favorites')
+    op.create_table(
+        'favorites_old',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('outfit_id', sa.Integer(), sa.ForeignKey('outfits.id')),
+    )
+    op.execute("INSERT INTO favorites_old (user_id, outfit_id) SELECT user_id, outfit_id FROM favorites")
+    op.drop_table('favorites')
+    op.rename_table('favorites_old', 'favorites')
@@ -0,0 +1,25 @@
+"""Прогресс массового импорта
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'import_checkpoints',
+        sa.Column('source', sa.String(), primary_key=True),
+        sa.Column('rows_done', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('import_checkpoints')
@@ -0,0 +1,76 @@
+"""Каталог вещей без дублей: ключ (name, brand, model) и первичный ключ outfit_items
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+# Копия models.item_key на момент ревизии: миграция не должна зависеть от будущих правок модели
+def item_key(*values):
+    return "\x1f".join(" ".join((value or "").split()).casefold() for value in values)
+
+
+def upgrade():
+    bind = op.get_bind()
+    canonical, duplicates = {}, {}
+    for item_id, name, brand, model in bind.execute(sa.text("SELECT id, name, brand, model FROM items ORDER BY id")):
+        key = item_key(name, brand, model)
+        if key in canonical:
+            duplicates[item_id] = canonical[key]
+        else:
+            canonical[key] = item_id
+
+    # Связи переводятся на вещь с меньшим id, повторы схлопываются при пересоздании outfit_items
+    if duplicates:
+        bind.execute(
+            sa.text("UPDATE outfit_items SET item_id = :canonical_id WHERE item_id = :item_id"),
+            [{"item_id": item_id, "canonical_id": canonical_id} for item_id, canonical_id in duplicates.items()]
+        )
+        bind.execute(sa.text("DELETE FROM items WHERE id = :item_id"), [{"item_id": item_id} for item_id in duplicates])
+    op.create_table(
+        'outfit_items_new',
+        sa.Column('outfit_id', sa.Integer(), sa.ForeignKey('outfits.id', ondelete='CASCADE', name='outfit_items_outfit_id_fkey'), primary_key=True),
+        sa.Column('item_id', sa.Integer(), sa.ForeignKey('items.id', ondelete='CASCADE', name='outfit_items_item_id_fkey'), primary_key=True),
+        sa.PrimaryKeyConstraint('outfit_id', 'item_id', name='outfit_items_pkey'),
+    )
+    op.execute(
+        "INSERT INTO outfit_items_new (outfit_id, item_id) "
+        "SELECT DISTINCT outfit_id, item_id FROM outfit_items WHERE outfit_id IS NOT NULL AND item_id IS NOT NULL"
+    )
+    op.drop_table('outfit_items')
+    op.rename_table('outfit_items_new', 'outfit_items')
+    op.create_index('ix_outfit_items_item_id', 'outfit_items', ['item_id'])
+
+    with op.batch_alter_table('items') as batch_op:
+        batch_op.add_column(sa.Column('key', sa.String()))
+    if canonical:
+        bind.execute(
+            sa.text("UPDATE items SET key = :key WHERE id = :item_id"),
+            [{"item_id": item_id, "key": key} for key, item_id in canonical.items()]
+        )
+    with op.batch_alter_table('items') as batch_op:
+        batch_op.alter_column('key', existing_type=sa.String(), nullable=False)
+        batch_op.create_unique_constraint('items_key_key', ['key'])
+
+
+def downgrade():
+    with op.batch_alter_table('items') as batch_op:
+        batch_op.drop_constraint('items_key_key', type_='unique')
+        batch_op.drop_column('key')
+    op.drop_index('ix_outfit_items_item_id', table_name='outfit_items')
+    op.create_table(
+        'outfit_items_old',
+        sa.Column('outfit_id', sa.Integer(), sa.ForeignKey('outfits.id')),
+        sa.Column('item_id', sa.Integer(), sa.ForeignKey('items.id')),
+    )
+    op.execute("INSERT INTO outfit_items_old (outfit_id, item_id) SELECT outfit_id, item_id FROM outfit_items")
+    op.drop_table('outfit_items')
+    op.rename_table('outfit_items_old', 'outfit_items')
@@ -0,0 +1,41 @@
+"""Матрица совместных добавлений в избранное и заранее посчитанные рекомендации
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'outfit_cofavorites',
+        sa.Column('outfit_id', sa.Integer(), sa.ForeignKey('outfits.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('other_id', sa.Integer(), sa.ForeignKey('outfits.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_outfit_cofavorites_other_id', 'outfit_cofavorites', ['other_id'])
+    op.create_table(
+        'outfit_recommendations',
+        sa.Column('outfit_id', sa.Integer(), sa.ForeignKey('outfits.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('recommended', sa.JSON(), nullable=False),
+    )
+    # Матрица по уже накопленному избранному; списки рекомендаций строит python -m app.recommendations
+    op.execute(
+        "INSERT INTO outfit_cofavorites (outfit_id, other_id, count) "
+        "SELECT a.outfit_id, b.outfit_id, COUNT(*) FROM favorites a "
+        "JOIN favorites b ON b.user_id = a.user_id AND b.outfit_id <> a.outfit_id "
+        "GROUP BY a.outfit_id, b.outfit_id"
+    )
+
+
+def downgrade():
+    op.drop_table('outfit_recommendations')
+    op.drop_index('ix_outfit_cofavorites_other_id', table_name='outfit_cofavorites')
+    op.drop_table('outfit_cofavorites')
@@ -0,0 +1,29 @@
+"""Время последнего изменения аутфита для инкрементальной выгрузки
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('outfits') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True)))
+    # Существующие аутфиты считаются изменёнными в момент миграции
+    op.execute("UPDATE outfits SET updated_at = CURRENT_TIMESTAMP")
+    with op.batch_alter_table('outfits') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(timezone=True), nullable=False)
+    op.create_index('ix_outfits_updated_at', 'outfits', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_outfits_updated_at', table_name='outfits')
+    with op.batch_alter_table('outfits') as batch_op:
+        batch_op.drop_column('updated_at')
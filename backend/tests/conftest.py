@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+# Отдельная SQLite-база и каталоги на время тестов; настройки читаются при импорте app, поэтому задаются здесь.
+# Строгий режим бюджета SQL-запросов: превышение бюджета эндпоинта — исключение в тесте
+TEST_DIR = tempfile.mkdtemp(prefix="outfitted-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("CACHE_URL", None)
+os.environ["QUERY_BUDGET_STRICT"] = "1"
+os.environ["FEATURES_DIR"] = os.path.join(TEST_DIR, "features")
+os.environ["IMAGES_DIR"] = os.path.join(TEST_DIR, "images")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app import migrate, models, database, auth
+
+migrate.upgrade()
+
+from app.main import app
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+# Пользователь с токеном: make_user("name", is_admin=True) -> заголовки авторизации
+@pytest.fixture(scope="session")
+def make_user():
+    def create(name: str, is_admin: bool = False) -> dict:
+        db = database.SessionLocal()
+        try:
+            user = models.User(username=name, email=f"{name}@example.com", hashed_password="-", is_admin=is_admin)
+            db.add(user)
+            db.commit()
+            return {"Authorization": f"Bearer {auth.create_access_token({'sub': str(user.id)})}"}
+        finally:
+            db.close()
+    return create
+
+# Аутфиты в категории (создаётся при отсутствии): make_outfits(3, "category", image_url=...) -> id по порядку
+@pytest.fixture(scope="session")
+def make_outfits():
+    def create(count: int, category: str = "tests", **fields) -> list[int]:
+        db = database.SessionLocal()
+        try:
+            db_category = db.scalar(select(models.Category).where(models.Category.name == category)) or models.Category(name=category)
+            outfits = [models.Outfit(**{"title": f"{category} {i}", "description": "", **fields}, category=db_category) for i in range(count)]
+            db.add_all(outfits)
+            db.commit()
+            return [outfit.id for outfit in outfits]
+        finally:
+            db.close()
+    return create
@@ -0,0 +1,48 @@
+import asyncio
+import socket
+import time
+import pytest
+from app import cache
+
+pytest.importorskip("redis")
+
+# Зависший Redis: сокет принимает соединения, но ничего не отвечает
+@pytest.fixture
+def silent_redis_cache():
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen(64)
+        backend = cache.RedisBackend(f"redis://127.0.0.1:{server.getsockname()[1]}/0", timeout=0.05)
+        yield cache.ResponseCache(cache.LRUCache(), backend)
+
+def test_unresponsive_backend_degrades_to_misses(silent_redis_cache):
+    started = time.monotonic()
+    assert silent_redis_cache.versioned_key("key", ["tag"]) is None
+    assert silent_redis_cache.get("key") is None
+    silent_redis_cache.set("key", b"{}", '"etag"')
+    silent_redis_cache.invalidate("tag")
+    assert time.monotonic() - started < 5
+
+def test_backend_calls_do_not_block_event_loop(silent_redis_cache):
+    async def measure() -> int:
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await silent_redis_cache.aversioned_key("key", ["tag"])
+        await silent_redis_cache.ainvalidate("tag")
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(measure()) > 5
+
+def test_endpoint_answers_while_backend_is_down(client, silent_redis_cache, monkeypatch):
+    monkeypatch.setattr(cache, "response_cache", silent_redis_cache)
+    response = client.get("/categories/")
+    assert response.status_code == 200
+    assert response.headers["ETag"]
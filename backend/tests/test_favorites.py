@@ -0,0 +1,44 @@
+from sqlalchemy import func, select
+from app import models, database, favorites
+
+# favorites_count меняется ровно на число реально добавленных/убранных строк:
+# повторы и отсутствующие аутфиты счётчик не трогают, а результат совпадает с полным пересчётом
+def stored_counts(outfit_ids: list[int]) -> dict[int, int]:
+    db = database.SessionLocal()
+    try:
+        return dict(db.execute(select(models.Outfit.id, models.Outfit.favorites_count).where(models.Outfit.id.in_(outfit_ids))).all())
+    finally:
+        db.close()
+
+def actual_counts(outfit_ids: list[int]) -> dict[int, int]:
+    db = database.SessionLocal()
+    try:
+        rows = db.execute(
+            select(models.favorites.c.outfit_id, func.count()).where(models.favorites.c.outfit_id.in_(outfit_ids)).group_by(models.favorites.c.outfit_id)
+        ).all()
+        return {outfit_id: dict(rows).get(outfit_id, 0) for outfit_id in outfit_ids}
+    finally:
+        db.close()
+
+def test_favorite_counts_follow_changes(client, make_user, make_outfits):
+    first, second = make_user("counts1"), make_user("counts2")
+    a, b, c = outfit_ids = make_outfits(3, "counts")
+    missing = 10**9
+
+    assert client.post(f"/favorites/{a}", headers=first).json()["changed"] is True
+    assert client.post(f"/favorites/{a}", headers=first).json()["changed"] is False
+    response = client.post("/favorites/bulk", json={"outfit_ids": [a, b, c, missing]}, headers=first).json()
+    assert response == {"added": [b, c], "missing": [missing]}
+    assert client.post("/favorites/bulk", json={"outfit_ids": [a, b, b]}, headers=second).json()["added"] == [a, b]
+    assert client.post(f"/favorites/{missing}", headers=first).status_code == 404
+    assert stored_counts(outfit_ids) == {a: 2, b: 2, c: 1}
+
+    assert client.delete(f"/favorites/{a}", headers=first).json()["changed"] is True
+    assert client.delete(f"/favorites/{a}", headers=first).json()["changed"] is False
+    assert client.request("DELETE", "/favorites/bulk", json={"outfit_ids": [a, c]}, headers=second).json() == {"removed": [a]}
+    assert client.get(f"/favorites/{b}", headers=second).json() == {"is_favorite": True}
+    assert client.get(f"/favorites/{a}", headers=second).json() == {"is_favorite": False}
+    assert stored_counts(outfit_ids) == actual_counts(outfit_ids) == {a: 0, b: 2, c: 1}
+
+    favorites.recount_all()
+    assert stored_counts(outfit_ids) == {a: 0, b: 2, c: 1}
@@ -0,0 +1,50 @@
+import csv
+from sqlalchemy import func, select
+from app import models, database, import_outfits
+
+# Пачки по 2 строки: одна и та же вещь встречается в разных пачках, две строки с ошибками
+ROWS = [
+    {"title": "Imported 1", "category": "Imported", "image_url": "/images/outfits/1.jpg", "items": "Cap|Brand|1;Shoes|Brand|2"},
+    {"title": "Imported 2", "category": "Imported", "image_url": "/images/outfits/2.jpg", "items": "Cap|Brand|1"},
+    {"title": "", "category": "Imported", "image_url": "/images/outfits/3.jpg", "items": "Scarf|Brand|4"},
+    {"title": "Imported 4", "category": "Imported", "image_url": "/images/outfits/4.jpg", "items": "Cap|Brand|1;Coat|Brand|3"},
+    {"title": "Imported 5", "category": "Imported", "image": "missing.jpg", "items": "Cap|Brand|1"},
+]
+
+def write_manifest(path) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, ["title", "category", "image", "image_url", "items"])
+        writer.writeheader()
+        writer.writerows(ROWS)
+    return str(path)
+
+def summary(output: str) -> str:
+    return next(line for line in output.splitlines() if line.startswith("Импорт завершён"))
+
+def test_import_reports_counts(tmp_path, capsys):
+    manifest = write_manifest(tmp_path / "manifest.csv")
+    import_outfits.run_import(manifest, workers=1, batch_size=2)
+    output = capsys.readouterr().out
+    line = summary(output)
+    assert "5 строк" in line
+    assert "аутфитов 3, различных вещей 3, пропущено 2" in line
+    # Без CACHE_URL кэш воркеров API из процесса импорта не сбросить — об этом сообщается
+    assert "Кэш ответов API не сброшен" in output
+
+    db = database.SessionLocal()
+    try:
+        outfits = db.scalars(select(models.Outfit).join(models.Category).where(models.Category.name == "Imported")).all()
+        assert sorted(outfit.title for outfit in outfits) == ["Imported 1", "Imported 2", "Imported 4"]
+        assert db.scalar(select(func.count()).select_from(models.Item).where(models.Item.name == "Cap")) == 1
+        assert {outfit.title: sorted(item.name for item in outfit.items) for outfit in outfits}["Imported 4"] == ["Cap", "Coat"]
+    finally:
+        db.close()
+
+def test_import_resumes_from_checkpoint(tmp_path, capsys):
+    manifest = write_manifest(tmp_path / "manifest.csv")
+    import_outfits.run_import(manifest, workers=1, batch_size=2)
+    capsys.readouterr()
+    import_outfits.run_import(manifest, workers=1, batch_size=2)
+    output = capsys.readouterr().out
+    assert "пропущено 5 уже загруженных строк" in output
+    assert "аутфитов 0, различных вещей 0, пропущено 0" in summary(output)
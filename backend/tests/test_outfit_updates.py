@@ -0,0 +1,57 @@
+import os
+import pytest
+from app import images, similarity
+
+@pytest.fixture(scope="module")
+def admin(make_user):
+    return make_user("updates-admin", is_admin=True)
+
+# Фоновые задачи по изображению записываются вместо запуска в пуле процессов
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(images, "schedule_variants", lambda outfit_id, path: calls.append(("variants", outfit_id, path)))
+    monkeypatch.setattr(similarity, "schedule_features", lambda outfit_id, path: calls.append(("features", outfit_id, path)))
+    monkeypatch.setattr(similarity.feature_index, "remove", lambda outfit_id: calls.append(("remove", outfit_id)))
+    return calls
+
+@pytest.mark.parametrize("method", ["PUT", "PATCH"])
+def test_image_change_reschedules_variants_and_features(client, make_outfits, admin, scheduled, method):
+    (outfit_id,) = make_outfits(1, "updates", image_url="/images/outfits/old.jpg", image_variants={"thumb": {"jpeg": "/old_thumb.jpg"}})
+    name = f"{outfit_id:064x}.png"
+    os.makedirs(images.IMAGES_DIR, exist_ok=True)
+    with open(os.path.join(images.IMAGES_DIR, name), "wb") as f:
+        f.write(b"png")
+    payload = {"image_url": f"{images.IMAGES_URL}/{name}"}
+    if method == "PUT":
+        payload.update(title="Updated", category_id=client.get(f"/outfits/{outfit_id}").json()["category_id"])
+    response = client.request(method, f"/outfits/{outfit_id}", json=payload, headers=admin)
+    assert response.status_code == 200, response.text
+    assert response.json()["image_variants"] is None
+    path = os.path.join(images.IMAGES_DIR, name)
+    assert scheduled == [("variants", outfit_id, path), ("features", outfit_id, path)]
+
+def test_external_image_drops_features(client, make_outfits, admin, scheduled):
+    (outfit_id,) = make_outfits(1, "updates", image_url="/images/outfits/old.jpg")
+    response = client.patch(f"/outfits/{outfit_id}", json={"image_url": "https://example.com/outfit.jpg"}, headers=admin)
+    assert response.status_code == 200, response.text
+    assert scheduled == [("remove", outfit_id)]
+
+def test_unchanged_image_schedules_nothing(client, make_outfits, admin, scheduled):
+    (outfit_id,) = make_outfits(1, "updates", image_url="/images/outfits/old.jpg")
+    response = client.patch(f"/outfits/{outfit_id}", json={"title": "Renamed", "image_url": "/images/outfits/old.jpg"}, headers=admin)
+    assert response.status_code == 200, response.text
+    assert scheduled == []
+
+def test_patch_clears_nullable_fields(client, make_outfits, admin, scheduled):
+    (outfit_id,) = make_outfits(1, "updates", image_url="/images/outfits/old.jpg")
+    response = client.patch(f"/outfits/{outfit_id}", json={"description": None, "image_url": None}, headers=admin)
+    assert response.status_code == 200, response.text
+    assert response.json()["description"] is None and response.json()["image_url"] is None
+    assert response.json()["title"] == "updates 0"
+
+@pytest.mark.parametrize("field", ["title", "category_id", "items"])
+def test_patch_rejects_null_for_required_fields(client, make_outfits, admin, field):
+    (outfit_id,) = make_outfits(1, "updates")
+    response = client.patch(f"/outfits/{outfit_id}", json={field: None}, headers=admin)
+    assert response.status_code == 422
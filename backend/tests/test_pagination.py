@@ -0,0 +1,49 @@
+from sqlalchemy import select
+from app import models, database, pagination
+
+# Обход каталога по next_cursor: каждая строка ровно один раз, в порядке id, тот же результат, что и по offset
+def category_id_of(name: str) -> int:
+    db = database.SessionLocal()
+    try:
+        return db.scalar(select(models.Category.id).where(models.Category.name == name))
+    finally:
+        db.close()
+
+def walk(client, cursor=None, **params) -> list[int]:
+    ids = []
+    while True:
+        response = client.get("/outfits/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids.extend(outfit["id"] for outfit in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+def test_cursor_walk_covers_category_once(client, make_outfits):
+    created = make_outfits(7, "paging")
+    category_id = category_id_of("paging")
+    assert walk(client, category_id=category_id, limit=3) == created
+    offset_ids = [
+        outfit["id"]
+        for offset in range(0, 9, 3)
+        for outfit in client.get("/outfits/", params={"category_id": category_id, "limit": 3, "offset": offset}).json()["items"]
+    ]
+    assert offset_ids == created
+    page = client.get("/outfits/", params={"category_id": category_id, "limit": 7}).json()
+    assert page["total"] == 7 and page["next_cursor"] is None
+
+def test_cursor_is_stable_under_inserts(client, make_outfits):
+    created = make_outfits(4, "paging-inserts")
+    category_id = category_id_of("paging-inserts")
+    first = client.get("/outfits/", params={"category_id": category_id, "limit": 2}).json()
+    # Вставка во время обхода не сдвигает уже выданные страницы: новые строки оказываются в конце
+    added = make_outfits(2, "paging-inserts")
+    rest = walk(client, category_id=category_id, limit=2, cursor=first["next_cursor"])
+    assert [outfit["id"] for outfit in first["items"]] + rest == created + added
+
+def test_cursor_is_bound_to_filter(client, make_outfits):
+    make_outfits(1, "paging-other")
+    cursor = pagination.encode_cursor(1, None)
+    assert client.get("/outfits/", params={"cursor": cursor, "category_id": category_id_of("paging-other")}).status_code == 400
+    assert client.get("/outfits/", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,88 @@
+import pytest
+from fastapi import Depends
+from sqlalchemy import insert, select, text
+from app import models, database, auth, cache, pagination
+from app.main import app
+
+# Число SQL-запросов эндпоинтов не должно зависеть от объёма данных (нет N+1),
+# а в строгом режиме (conftest) превышение бюджета эндпоинта роняет запрос
+def seed(outfits: int, user_id: int):
+    db = database.SessionLocal()
+    try:
+        category_ids = db.scalars(select(models.Category.id)).all()
+        if not category_ids:
+            db.add_all([models.Category(name=f"category {i}") for i in range(3)])
+            db.flush()
+            category_ids = db.scalars(select(models.Category.id)).all()
+        shared = db.scalar(select(models.Item).where(models.Item.name == "Shared cap"))
+        if shared is None:
+            shared = models.Item(name="Shared cap", brand="Brand")
+        start = db.scalar(select(models.Outfit.id).order_by(models.Outfit.id.desc()).limit(1)) or 0
+        created = []
+        for number in range(start + 1, start + outfits + 1):
+            outfit = models.Outfit(
+                title=f"Outfit {number}",
+                description="description",
+                image_url=f"/images/outfits/{number}.jpg",
+                category_id=category_ids[number % len(category_ids)],
+                items=[models.Item(name=f"Item {number}", brand="Brand", model=str(number)), shared],
+            )
+            db.add(outfit)
+            created.append(outfit)
+        db.flush()
+        db.execute(insert(models.favorites), [{"user_id": user_id, "outfit_id": outfit.id} for outfit in created])
+        db.commit()
+        return created[0].id
+    finally:
+        db.close()
+
+@pytest.fixture(scope="module")
+def user_id():
+    db = database.SessionLocal()
+    try:
+        user = models.User(username="budget", email="budget@example.com", hashed_password="-", is_admin=False)
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+@pytest.fixture
+def headers(user_id):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': str(user_id)})}"}
+
+# Каждый замер — с холодными кэшами, иначе ответ отдаётся без запросов к БД
+def reset_caches():
+    cache.response_cache.local.clear()
+    auth.principal_cache.clear()
+    pagination.outfit_counts.invalidate()
+
+def query_counts(client, headers, outfit_id: int) -> dict[str, int]:
+    counts = {}
+    for path in ("/outfits/", f"/outfits/{outfit_id}", "/favorites/", "/users/me"):
+        reset_caches()
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.text
+        counts[path.replace(str(outfit_id), "{id}")] = int(response.headers["X-Query-Count"])
+    return counts
+
+def test_query_counts_do_not_grow_with_data(client, user_id, headers):
+    outfit_id = seed(5, user_id)
+    small = query_counts(client, headers, outfit_id)
+    seed(45, user_id)
+    large = query_counts(client, headers, outfit_id)
+    assert large == small
+
+def test_strict_mode_fails_over_budget(client):
+    @app.get("/__budget-probe", dependencies=[Depends(database.query_budget(1))])
+    def probe():
+        db = database.SessionLocal()
+        try:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 1"))
+        finally:
+            db.close()
+        return {}
+
+    with pytest.raises(database.QueryBudgetExceeded):
+        client.get("/__budget-probe")
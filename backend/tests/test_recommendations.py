@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import select
+from app import models, database, recommendations
+
+# Инкрементальный пересчёт (favorites.py + recommendations.refresh в фоновых задачах) должен давать
+# ту же матрицу совместных добавлений и те же списки, что и полный пересчёт rebuild_all()
+def snapshot() -> tuple[list, dict]:
+    db = database.SessionLocal()
+    try:
+        pairs = models.outfit_cofavorites.c
+        matrix = db.execute(select(pairs.outfit_id, pairs.other_id, pairs.count).where(pairs.count > 0).order_by(pairs.outfit_id, pairs.other_id)).all()
+        lists = dict(db.execute(select(models.OutfitRecommendation.outfit_id, models.OutfitRecommendation.recommended)).all())
+        return [tuple(row) for row in matrix], lists
+    finally:
+        db.close()
+
+def assert_matches_rebuild():
+    incremental = snapshot()
+    recommendations.rebuild_all()
+    assert incremental == snapshot()
+
+@pytest.fixture(scope="module")
+def users(make_user):
+    return [make_user(f"recommend{i}") for i in range(3)], make_user("recommend-admin", is_admin=True)
+
+def test_incremental_refresh_matches_rebuild(client, users, make_outfits):
+    (first, second, third), admin = users
+    # Избранное из других тестов вставлено напрямую, мимо матрицы: начинаем с согласованного состояния
+    recommendations.rebuild_all()
+    a, b, c, d, e = make_outfits(5)
+    assert client.post("/favorites/bulk", json={"outfit_ids": [a, b, c]}, headers=first).status_code == 200
+    assert client.post("/favorites/bulk", json={"outfit_ids": [a, b, d]}, headers=second).status_code == 200
+    assert client.post(f"/favorites/{c}", headers=third).status_code == 200
+    assert client.post(f"/favorites/{e}", headers=third).status_code == 200
+    assert_matches_rebuild()
+
+    assert client.delete(f"/favorites/{b}", headers=first).status_code == 200
+    assert client.request("DELETE", "/favorites/bulk", json={"outfit_ids": [a, d]}, headers=second).status_code == 200
+    assert_matches_rebuild()
+
+    # Удаление аутфита: пары и список уходят вместе с ним, соседи пересчитываются
+    assert client.post(f"/favorites/{e}", headers=first).status_code == 200
+    assert client.delete(f"/outfits/{e}", headers=admin).status_code == 200
+    assert_matches_rebuild()
+
+    # В SQLite новый аутфит получает id удалённого и не должен унаследовать его пары
+    (reused,) = make_outfits(1)
+    assert client.post(f"/favorites/{reused}", headers=second).status_code == 200
+    assert_matches_rebuild()
+    matrix, lists = snapshot()
+    assert lists[a] == [[c, 1.0]]
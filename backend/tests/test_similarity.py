@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from app.similarity import FeatureIndex, FEATURE_DIM
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Читатель в отдельном процессе (как второй воркер): держит матрицу отображённой в память
+# и крутит similar(), пока тест перестраивает индекс
+READER = """
+import sys, time
+from app.similarity import FeatureIndex
+index = FeatureIndex(sys.argv[1], sys.argv[2])
+deadline = time.monotonic() + float(sys.argv[3])
+while time.monotonic() < deadline:
+    for outfit_id in (1, 2, 3):
+        index.similar(outfit_id, 5)
+        index.matrix.sum()
+"""
+
+def random_matrix(rows: int, seed: int) -> np.ndarray:
+    matrix = np.random.default_rng(seed).random((rows, FEATURE_DIM), dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+def make_index(tmp_path) -> FeatureIndex:
+    return FeatureIndex(str(tmp_path / "features.f32"), str(tmp_path / "feature_ids.npy"))
+
+def test_rebuild_keeps_mapped_matrix_readable(tmp_path):
+    writer, reader = make_index(tmp_path), make_index(tmp_path)
+    writer.rebuild(np.arange(1, 2001), random_matrix(2000, 0))
+    assert reader.similar(1, 3)
+    mapped = reader.matrix
+    writer.rebuild(np.arange(1, 11), random_matrix(10, 1))
+    # Старое отображение указывает на прежний файл и читается целиком; новое — уже по новым данным
+    assert mapped.shape == (2000, FEATURE_DIM) and np.isfinite(mapped.sum())
+    assert len(reader.similar(1, 20)) == 9
+
+def test_rebuild_while_reader_process_is_live(tmp_path):
+    writer = make_index(tmp_path)
+    writer.rebuild(np.arange(1, 3001), random_matrix(3000, 0))
+    process = subprocess.Popen([sys.executable, "-c", READER, writer.matrix_path, writer.ids_path, "3"], cwd=BACKEND_DIR)
+    try:
+        for step in range(40):
+            rows = 3000 if step % 2 else 5
+            writer.rebuild(np.arange(1, rows + 1), random_matrix(rows, step))
+            writer.upsert(rows + 1, random_matrix(1, step)[0])
+    finally:
+        assert process.wait(timeout=30) == 0
+    assert len(writer.ids) == 3001 and os.path.getsize(writer.matrix_path) >= 3001 * FEATURE_DIM * 4
@@ -3,13 +3,15 @@ import axios from 'axios';
 import { Box, Typography } from '@mui/material';
 
 const API_URL = 'http://localhost:8000';
+// Сетке нужны только эти поля — остальные сервер не отдаёт
+const GRID_FIELDS = 'id,title,image_url,thumbnail_url';
 
 const Home: React.FC = () => {
   const [outfits, setOutfits] = useState<any[]>([]);
 
   useEffect(() => {
     axios
-      .get(`${API_URL}/outfits/?limit=3`)
+      .get(`${API_URL}/outfits/`, { params: { limit: 3, fields: GRID_FIELDS } })
       .then(res => setOutfits(res.data.items));
   }, []);
 
@@ -94,7 +96,7 @@ const Home: React.FC = () => {
               }}
             >
               <img
-                src={outfit.image_url}
+                src={outfit.thumbnail_url || outfit.image_url}
                 alt={outfit.title}
                 style={{ width: '100%', height: '100%', objectFit: 'contain', background: '#fff', borderRadius: 8 }}
               />
@@ -35,33 +35,22 @@ const OutfitPage: React.FC = () => {
     fetchOutfit();
   }, [id]);
 
+  // Пользователь и его избранное — одним запросом
   useEffect(() => {
-    const checkFavorite = async () => {
-      if (!token || !id) return;
-      try {
-        const res = await axios.get(`${API_URL}/favorites/`, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
-        setIsFavorite(res.data.some((fav: any) => fav.id === Number(id)));
-      } catch {}
-    };
-    checkFavorite();
-  }, [id, token]);
-
-  useEffect(() => {
-    const fetchUser = async () => {
+    const fetchBootstrap = async () => {
       if (!token) return;
       try {
-        const res = await axios.get(`${API_URL}/users/me`, {
+        const res = await axios.get(`${API_URL}/users/me/bootstrap`, {
           headers: { Authorization: `Bearer ${token}` },
         });
-        setUser(res.data);
+        setUser(res.data.user);
+        setIsFavorite(res.data.favorite_ids.includes(Number(id)));
       } catch {
         setUser(null);
       }
     };
-    fetchUser();
-  }, [token]);
+    fetchBootstrap();
+  }, [id, token]);
 
   const handleFavorite = async () => {
     if (!token) return;
@@ -101,7 +90,7 @@ const OutfitPage: React.FC = () => {
   return (
     <Box sx={{ display: 'flex', flexDirection: { xs: 'column', md: 'row' }, gap: 4, alignItems: 'flex-start', mt: 2 }}>
       <Box sx={{ flex: 1, display: 'flex', flexDirection: 'column', alignItems: 'center' }}>
-        <img src={outfit.image_url} alt={outfit.title} style={{ width: '100%', maxWidth: 500, borderRadius: 12 }} />
+        <img src={outfit.medium_url || outfit.image_url} alt={outfit.title} style={{ width: '100%', maxWidth: 500, borderRadius: 12 }} />
         <Button
           onClick={() => navigate(-1)}
           sx={{
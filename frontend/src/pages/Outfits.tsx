@@ -1,10 +1,12 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import { Box, Typography, Pagination, Button, Stack } from '@mui/material';
 
 const API_URL = 'http://localhost:8000';
 const limit = 12;
+// Сетке нужны только эти поля — остальные сервер не отдаёт
+const GRID_FIELDS = 'id,title,image_url,thumbnail_url';
 
 const Outfits: React.FC = () => {
   const [outfits, setOutfits] = useState<any[]>([]);
@@ -12,6 +14,8 @@ const Outfits: React.FC = () => {
   const [page, setPage] = useState(1);
   const [categories, setCategories] = useState<any[]>([]);
   const [selectedCategory, setSelectedCategory] = useState<number | null>(null);
+  // Курсоры уже просмотренных страниц: следующая страница грузится по курсору, а не по offset
+  const cursors = useRef<Record<number, string>>({});
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -19,13 +23,20 @@ const Outfits: React.FC = () => {
   }, []);
 
   useEffect(() => {
-    const params: any = { limit, offset: (page - 1) * limit };
+    cursors.current = {};
+  }, [selectedCategory]);
+
+  useEffect(() => {
+    const params: any = { limit, fields: GRID_FIELDS };
+    if (cursors.current[page]) params.cursor = cursors.current[page];
+    else params.offset = (page - 1) * limit;
     if (selectedCategory) params.category_id = selectedCategory;
     axios
       .get(`${API_URL}/outfits/`, { params })
       .then(res => {
         setOutfits(res.data.items);
         setTotal(res.data.total);
+        if (res.data.next_cursor) cursors.current[page + 1] = res.data.next_cursor;
       });
   }, [page, selectedCategory]);
 
@@ -118,7 +129,7 @@ const Outfits: React.FC = () => {
               }}
             >
               <img
-                src={outfit.image_url}
+                src={outfit.thumbnail_url || outfit.image_url}
                 alt={outfit.title}
                 style={{ width: '100%', height: '100%', objectFit: 'contain', background: '#fff', borderRadius: 8 }}
               />
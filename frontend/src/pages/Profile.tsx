@@ -50,32 +50,34 @@ const Profile: React.FC = () => {
       localStorage.setItem('token', res.data.access_token);
       setToken(res.data.access_token);
       fetchUserInfo(res.data.access_token);
-      fetchFavorites(res.data.access_token);
     } catch (e: any) {
       setError(e.response?.data?.detail || 'Ошибка входа');
     }
   };
 
+  // Пользователь и id избранного одним запросом, затем карточки избранного пачкой — только поля для сетки
   const fetchUserInfo = async (jwt?: string) => {
     try {
-      const res = await axios.get(`${API_URL}/users/me`, {
+      const res = await axios.get(`${API_URL}/users/me/bootstrap`, {
         headers: { Authorization: `Bearer ${jwt || token}` },
       });
-      setUser(res.data);
+      setUser(res.data.user);
+      await fetchFavorites(res.data.favorite_ids);
     } catch {
       setUser(null);
+      setFavorites([]);
     }
   };
 
-  const fetchFavorites = async (jwt?: string) => {
-    try {
-      const res = await axios.get(`${API_URL}/favorites/`, {
-        headers: { Authorization: `Bearer ${jwt || token}` },
+  const fetchFavorites = async (ids: number[]) => {
+    const cards: any[] = [];
+    for (let start = 0; start < ids.length; start += 100) {
+      const res = await axios.get(`${API_URL}/outfits/batch`, {
+        params: { ids: ids.slice(start, start + 100).join(','), fields: 'id,title,image_url,thumbnail_url' },
       });
-      setFavorites(res.data);
-    } catch {
-      setFavorites([]);
+      cards.push(...res.data.items);
     }
+    setFavorites(cards);
   };
 
   const handleLogout = () => {
@@ -88,7 +90,6 @@ const Profile: React.FC = () => {
   React.useEffect(() => {
     if (token) {
       fetchUserInfo();
-      fetchFavorites();
     }
   }, [token]);
 
@@ -247,7 +248,7 @@ const Profile: React.FC = () => {
                     }}
                   >
                     <img
-                      src={outfit.image_url}
+                      src={outfit.thumbnail_url || outfit.image_url}
                       alt={outfit.title}
                       style={{ width: '100%', height: '100%', objectFit: 'contain', background: '#fff', borderRadius: 8 }}
                     />